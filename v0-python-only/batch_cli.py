@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Batch JSONL mode for the Pigeon Mix Calculator v2
+Reads one request per line from a file or stdin, calculates them on a
+bounded pool of worker processes and writes one JSON result per line, in
+input order. At most a fixed window of requests is in flight, so memory
+stays constant however long the input is.
+
+Request lines look like:
+    {"inventory": {"wheat": 5000, "peas": 2000}, "situation": "racing",
+     "target_weight": 1000, "seed": 7}
+Only inventory is required; situation defaults to maintenance,
+target_weight to 1000 grams and seed to 0. Optional "id" and "engine"
+fields are honoured, and "recipe_card": true adds the formatted card. A
+line that cannot be calculated gives an {"line": n, "error": "..."}
+result instead of stopping the batch.
+
+Usage:
+    python batch_cli.py [requests.jsonl | -] [--output results.jsonl]
+                        [--workers N] [--store results.sqlite3]
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, Optional, TextIO, Tuple
+
+import pigeon_mix_calculator_v2
+from mix_types import CalculationRequest
+from pigeon_mix_calculator_v2 import ENGINES, PROFILES, PigeonMixCalculator
+from shared_catalog import CatalogHandle
+
+# Requests queued per worker beyond the one it is running; bounds memory
+# while keeping every worker busy
+QUEUE_PER_WORKER = 2
+
+DEFAULT_SITUATION = "maintenance"
+DEFAULT_TARGET_WEIGHT = 1000
+DEFAULT_SEED = 0
+
+# Largest batch and stock amount accepted, in grams; keeps every sum finite
+MAX_TARGET_WEIGHT = 1_000_000
+MAX_STOCK = 1e12
+
+
+def is_grams(value: Any, limit: float) -> bool:
+    """True for a finite JSON number (not a boolean) no larger than limit"""
+    return (isinstance(value, (int, float)) and not isinstance(value, bool)
+            and value <= limit and math.isfinite(value))
+
+
+def dump(result: Dict[str, Any]) -> Tuple[bool, str]:
+    """(failed, strict JSON line) of a result; one holding NaN or infinity becomes an error record"""
+    try:
+        return "error" in result, json.dumps(result, allow_nan=False)
+    except ValueError:
+        error = {key: result[key] for key in ("line", "id") if key in result}
+        error["error"] = "Result has a non-finite number"
+        return True, json.dumps(error)
+
+
+def parse_request(text: str) -> Dict[str, Any]:
+    """Validated request of one JSONL line, with defaults filled in"""
+    try:
+        request = json.loads(text)
+    except json.JSONDecodeError as error:
+        raise ValueError(f"Invalid JSON: {error}") from None
+    if not isinstance(request, dict):
+        raise ValueError("Request must be a JSON object")
+
+    inventory = request.get("inventory")
+    if not isinstance(inventory, dict) or not inventory:
+        raise ValueError("Request needs a non-empty 'inventory' object")
+    if not all(is_grams(amount, MAX_STOCK) for amount in inventory.values()):
+        raise ValueError(f"Inventory amounts must be finite numbers of grams up to {MAX_STOCK:g}")
+
+    situation = str(request.get("situation", DEFAULT_SITUATION)).lower()
+    if situation not in PROFILES:
+        raise ValueError(f"Unknown situation '{situation}', expected one of {tuple(PROFILES)}")
+    target_weight = request.get("target_weight", DEFAULT_TARGET_WEIGHT)
+    if not is_grams(target_weight, MAX_TARGET_WEIGHT) or target_weight <= 0:
+        raise ValueError(f"'target_weight' must be a positive number of grams up to {MAX_TARGET_WEIGHT}")
+    seed = request.get("seed", DEFAULT_SEED)
+    if isinstance(seed, bool) or not isinstance(seed, int):
+        raise ValueError("'seed' must be an integer")
+    try:
+        json.dumps(request.get("id"), allow_nan=False)
+    except ValueError:
+        raise ValueError("'id' must not hold NaN or infinity") from None
+    engine = request.get("engine", "sample")
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}', expected one of {ENGINES}")
+
+    return {"id": request.get("id"), "inventory": inventory, "situation": situation,
+            "target_weight": target_weight, "seed": seed, "engine": engine,
+            "recipe_card": bool(request.get("recipe_card", False))}
+
+
+def calculate_request(request: Dict[str, Any]) -> Dict[str, Any]:
+    """Result record of a parsed request"""
+    calculation = pigeon_mix_calculator_v2.calculate(CalculationRequest(
+        request["inventory"], request["situation"], request["target_weight"], request["engine"], request["seed"]))
+    analysis = PigeonMixCalculator(request["inventory"], request["situation"]).analyze(calculation.mix)
+    result = {
+        "situation": request["situation"],
+        "target_weight": request["target_weight"],
+        "seed": request["seed"],
+        "engine": request["engine"],
+        "mix": calculation.mix.to_dict(),
+        "total": analysis.total,
+        "score": analysis.score,
+        "nutrition": dict(analysis.nutrition),
+        "categories": dict(analysis.categories),
+        "warnings": [list(warning) for warning in calculation.warnings],
+        "suggestions": list(calculation.suggestions),
+    }
+    if request["recipe_card"]:
+        result["recipe_card"] = calculation.recipe_card
+    return result
+
+
+def process_line(number: int, text: str) -> Tuple[bool, str]:
+    """(failed, JSON result line) for input line `number`; errors become error records"""
+    result = {"line": number}
+    try:
+        request = parse_request(text)
+    except (ValueError, TypeError) as error:
+        result["error"] = str(error)
+        return dump(result)
+    if request["id"] is not None:
+        result["id"] = request["id"]
+    try:
+        result.update(calculate_request(request))
+    except (ValueError, TypeError) as error:
+        result["error"] = str(error)
+    except Exception as error:
+        # Any other failure in the calculator fails this line, not the batch or the daemon thread
+        result["error"] = f"{type(error).__name__}: {error}"
+    return dump(result)
+
+
+def init_worker(store_path: Optional[str], catalog: Optional[CatalogHandle] = None):
+    """Open the shared result store in a worker process and attach to the published catalog"""
+    pigeon_mix_calculator_v2.attach_catalog(catalog)
+    if store_path is not None:
+        pigeon_mix_calculator_v2.open_result_store(store_path)
+
+
+def iter_lines(lines: Iterable[str]) -> Iterator[Tuple[int, str]]:
+    """(line number, text) of the non-blank input lines"""
+    for number, text in enumerate(lines, 1):
+        if text.strip():
+            yield number, text
+
+
+def iter_results(lines: Iterable[str], workers: int = 1,
+                 store_path: Optional[str] = None) -> Iterator[Tuple[bool, str]]:
+    """
+    (failed, JSON result line) for each JSONL request line, in input order
+
+    Args:
+        lines: Request lines, read lazily
+        workers: Worker processes; 1 calculates in this process
+        store_path: RESULT_STORE database shared by all workers, if any
+    """
+    if workers <= 1:
+        init_worker(store_path)
+        for number, text in iter_lines(lines):
+            yield process_line(number, text)
+        return
+
+    window = workers * (1 + QUEUE_PER_WORKER)
+    pending: deque = deque()
+    try:
+        catalog = pigeon_mix_calculator_v2.shared_catalog().handle
+    except OSError:
+        catalog = None
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(store_path, catalog)) as pool:
+        for number, text in iter_lines(lines):
+            if len(pending) >= window:
+                yield pending.popleft().result()
+            pending.append(pool.submit(process_line, number, text))
+        while pending:
+            future: Future = pending.popleft()
+            yield future.result()
+
+
+def run_batch(source: TextIO, output: TextIO, workers: int = 1,
+              store_path: Optional[str] = None) -> int:
+    """Stream results of every request in source to output; returns the number of error lines"""
+    errors = 0
+    for failed, line in iter_results(source, workers, store_path):
+        errors += failed
+        output.write(line + "\n")
+        output.flush()
+    return errors
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Calculate pigeon mixes for a JSONL stream of inventories")
+    parser.add_argument("input", nargs="?", default="-", help="JSONL requests file, or - for stdin (default)")
+    parser.add_argument("-o", "--output", default="-", help="JSONL results file, or - for stdout (default)")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: one per CPU)")
+    parser.add_argument("--store", default=os.environ.get("PIGEON_MIX_STORE"),
+                        help="Shared result store database (default: $PIGEON_MIX_STORE, none if unset)")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        errors = run_batch(source, output, args.workers, args.store)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    if errors:
+        print(f"{errors} request(s) failed; see the error records", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
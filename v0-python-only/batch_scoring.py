@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Vectorized batch scoring for pigeon mixes
+Flattens a batch of candidate mixes into one array of (mix, ingredient,
+grams) entries and sums the catalog columns it gathers per mix with
+np.bincount, so a whole batch is scored in a few NumPy operations and the
+work grows with the ingredients actually in the mixes, not with the size
+of the catalog.
+Requires NumPy; the v2 calculator only imports this module when its
+HAVE_NUMPY flag is set, and otherwise scores one mix at a time.
+"""
+
+import itertools
+from typing import Dict, List, NamedTuple, Sequence
+
+import numpy as np
+
+from compiled_catalog import CATEGORIES, NUTRIENTS, CompiledCatalog, PackedMix
+from scoring_profiles import CompiledProfile
+
+
+class MixFeatures(NamedTuple):
+    """Profile-independent features of a batch of mixes, one row per mix"""
+    nutrition: "np.ndarray"  # (batch, nutrient) percentages, columns ordered as NUTRIENTS
+    categories: "np.ndarray"  # (batch, category) percentages, columns ordered as CATEGORIES
+    counts: "np.ndarray"  # Ingredients per mix, for the diversity bonus
+
+
+class BatchScorer:
+    """Score batches of mixes against one profile, matching score_mix"""
+
+    def __init__(self, catalog: CompiledCatalog, profile: CompiledProfile):
+        """
+        Args:
+            catalog: Compiled ingredient catalog; its IDs index the gathered columns
+            profile: Compiled target profile (see scoring_profiles)
+        """
+        self.index = catalog.ids
+        # (ingredient, nutrient) view of the catalog's column-major block; no copy
+        self.nutrients = np.frombuffer(catalog.nutrients).reshape(len(NUTRIENTS), len(catalog.names)).T
+        self.category = np.frombuffer(catalog.category, dtype=np.int8).astype(np.intp)
+
+        self.macro_columns = [NUTRIENTS.index(row[0]) for row in profile.macros]
+        self.macro_targets = np.array([row[1] for row in profile.macros])
+        self.macro_reciprocals = np.array([row[2] for row in profile.macros])
+        self.macro_weights = np.array([row[3] for row in profile.macros])
+        self.fiber_column = NUTRIENTS.index("fiber")
+        self.category_columns = [CATEGORIES.index(row[0]) for row in profile.categories]
+        self.category_targets = np.array([row[1] for row in profile.categories])
+        self.category_reciprocals = np.array([row[2] for row in profile.categories])
+        self.category_weights = np.array([row[3] for row in profile.categories])
+        self.profile = profile
+
+    def features(self, counts: "np.ndarray", columns: "np.ndarray", grams: "np.ndarray") -> MixFeatures:
+        """
+        Features of flattened mixes
+
+        Args:
+            counts: Entries of each mix, in order
+            columns: Catalog ID of every entry, mix after mix
+            grams: Amount of every entry, mix after mix
+        """
+        size = len(counts)
+        rows = np.repeat(np.arange(size), counts)
+        totals = np.bincount(rows, grams, minlength=size)
+        scale = np.divide(1.0, totals, out=np.zeros(size), where=totals > 0)
+
+        weighted = self.nutrients[columns] * grams[:, None]
+        nutrition = np.stack([np.bincount(rows, weighted[:, i], minlength=size) for i in range(len(NUTRIENTS))],
+                             axis=1) * scale[:, None]
+        cells = rows * len(CATEGORIES) + self.category[columns]
+        categories = np.bincount(cells, grams, minlength=size * len(CATEGORIES)).reshape(size, len(CATEGORIES))
+        return MixFeatures(nutrition, categories * (scale * 100)[:, None], counts.astype(float))
+
+    def packed_features(self, mixes: Sequence[PackedMix]) -> MixFeatures:
+        """Features of packed (ids, amounts) mixes; the amounts arrays are joined, not iterated"""
+        counts = np.fromiter((len(ids) for ids, _ in mixes), dtype=np.intp, count=len(mixes))
+        size = int(counts.sum())
+        columns = np.fromiter(itertools.chain.from_iterable(ids for ids, _ in mixes), dtype=np.intp, count=size)
+        grams = np.frombuffer(b"".join(amounts for _, amounts in mixes), dtype=float)
+        return self.features(counts, columns, grams)
+
+    def mix_features(self, mixes: Sequence[Dict[str, float]]) -> MixFeatures:
+        """Features of dict mixes; names outside the catalog count towards diversity only"""
+        counts = np.fromiter((len(mix) for mix in mixes), dtype=np.intp, count=len(mixes))
+        size = int(counts.sum())
+        index = self.index
+        columns = np.fromiter((index.get(name, -1) for mix in mixes for name in mix), dtype=np.intp, count=size)
+        grams = np.fromiter((amount for mix in mixes for amount in mix.values()), dtype=float, count=size)
+        unknown = columns < 0
+        if unknown.any():
+            columns[unknown] = 0
+            grams[unknown] = 0
+        return self.features(counts, columns, grams)
+
+    def score(self, features: MixFeatures) -> "np.ndarray":
+        """Score every row of a batch's features against this scorer's profile"""
+        nutrition, categories, counts = features
+        profile = self.profile
+        actual = nutrition[:, self.macro_columns]
+        macros = np.maximum(0, 1 - np.abs(actual - self.macro_targets) * self.macro_reciprocals)
+        fiber = nutrition[:, self.fiber_column]
+        fiber_score = np.where(fiber < profile.fiber_limit, 1.0,
+                               np.maximum(0, 1 - (fiber - profile.fiber_limit) * profile.fiber_reciprocal))
+        actual = categories[:, self.category_columns]
+        category_scores = np.maximum(0, 1 - np.abs(actual - self.category_targets) * self.category_reciprocals)
+        diversity_score = np.minimum(1.0, counts / profile.diversity_count)
+
+        return (
+            macros @ self.macro_weights +
+            fiber_score * profile.fiber_weight +
+            category_scores @ self.category_weights +
+            diversity_score * profile.diversity_weight
+        )
+
+    def score_mixes(self, mixes: Sequence[Dict[str, float]]) -> List[float]:
+        """Score dict mixes; same values as score_mix up to float rounding"""
+        if not mixes:
+            return []
+        return self.score(self.mix_features(mixes)).tolist()
+
+    def score_packed(self, mixes: Sequence[PackedMix]) -> List[float]:
+        """Score packed (ids, amounts) mixes; same values as score_mixes"""
+        if not mixes:
+            return []
+        return self.score(self.packed_features(mixes)).tolist()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark for the Pigeon Mix Calculator v2
+Times the calculator import in fresh interpreters with nothing preloaded,
+so the numbers include every stdlib and third-party module the import pulls
+in, then the first herb_data() call. Reports the median wall time and, from
+separate runs under tracemalloc, the memory still allocated after each. The
+import is what API callers that never render herb sections pay; the herb
+load is what they save, shown next to the total.
+
+Usage:
+    python bench_import_time.py [runs]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Run with argument "memory" to trace allocations; timing runs are untraced
+PROBE = """
+import sys, time
+trace = sys.argv[1:] == ["memory"]
+if trace:
+    import tracemalloc
+    tracemalloc.start()
+start = time.perf_counter()
+import pigeon_mix_calculator_v2
+imported = time.perf_counter()
+size = tracemalloc.get_traced_memory()[0] if trace else 0
+pigeon_mix_calculator_v2.herb_data()
+loaded = time.perf_counter()
+herb_size = tracemalloc.get_traced_memory()[0] - size if trace else 0
+print(imported - start, size, loaded - imported, herb_size)
+"""
+
+
+def probe(*args: str):
+    """(import seconds, import bytes, herb load seconds, herb load bytes) from one fresh interpreter"""
+    output = subprocess.run([sys.executable, "-c", PROBE, *args], cwd=SOURCE_DIR, check=True,
+                            capture_output=True, text=True).stdout.split()
+    return [float(value) for value in output]
+
+
+def measure(runs: int):
+    """
+    Medians over `runs` fresh interpreters of (import seconds, import bytes,
+    herb load seconds, herb load bytes); times and sizes come from separate runs
+    """
+    times = [probe() for _ in range(runs)]
+    sizes = [probe("memory") for _ in range(runs)]
+    import_time, _, herb_time, _ = [statistics.median(column) for column in zip(*times)]
+    _, import_size, _, herb_size = [statistics.median(column) for column in zip(*sizes)]
+    return import_time, import_size, herb_time, herb_size
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 15
+    import_time, import_size, herb_time, herb_size = measure(runs)
+    total_time, total_size = import_time + herb_time, import_size + herb_size
+    print(f"Calculator import from a cold interpreter, median of {runs} runs:")
+    print(f"  mix only          {import_time * 1000:7.2f} ms  {import_size / 1024:8.1f} KiB")
+    print(f"  herbs on demand   {herb_time * 1000:7.2f} ms  {herb_size / 1024:8.1f} KiB")
+    print(f"  with herbs        {total_time * 1000:7.2f} ms  {total_size / 1024:8.1f} KiB")
+    print(f"The mix-only path saves {herb_time / total_time:.0%} of the time and "
+          f"{herb_size / total_size:.0%} of the memory")
+
+
+if __name__ == "__main__":
+    main()
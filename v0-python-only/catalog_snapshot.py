@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Precompiled catalog snapshot for the Pigeon Mix Calculator
+Stores the ingredient data and everything derived from it (compiled
+catalog, alias resolver, compiled profiles, catalog version) in one binary
+file, so short-lived processes start with a single read and unpickle
+instead of importing and compiling the Python catalog. Each snapshot
+records a hash of the source files it was built from and a digest of its
+pickled body; a snapshot whose source hash no longer matches, or whose body
+does not match its digest, is ignored and the caller falls back to the
+source. Snapshots are unpickled, so only load them from a directory as
+trusted as the code itself.
+
+Build or refresh the snapshot with:
+    python catalog_snapshot.py [path]
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import struct
+import sys
+from typing import Any, Dict, Iterable, Optional
+
+# Bump when the snapshot layout changes
+SNAPSHOT_FORMAT = 2
+
+MAGIC = b"PMCSNAP\0"
+# Magic, then the header length as a little-endian uint32
+PREFIX = struct.Struct("<8sI")
+
+
+def source_hash(paths: Iterable[str]) -> str:
+    """Hash of the bytes of every source file a snapshot is built from"""
+    digest = hashlib.sha256(str(SNAPSHOT_FORMAT).encode("ascii"))
+    for path in paths:
+        with open(path, "rb") as source:
+            data = source.read()
+        digest.update(os.path.basename(path).encode("utf-8"))
+        digest.update(struct.pack("<Q", len(data)))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def write_snapshot(path: str, payload: Dict[str, Any], sources: Iterable[str]):
+    """
+    Write a snapshot of payload built from sources
+
+    Written to a temporary file and renamed into place, so concurrent
+    readers see either the old snapshot or the new one.
+
+    Args:
+        path: Snapshot file
+        payload: Picklable objects to store
+        sources: Source files the payload was built from
+    """
+    body = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+    header = json.dumps({
+        "format": SNAPSHOT_FORMAT,
+        "source_hash": source_hash(sources),
+        "body_sha256": hashlib.sha256(body).hexdigest(),
+        "python": list(sys.version_info[:2]),
+    }).encode("utf-8")
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as snapshot:
+        snapshot.write(PREFIX.pack(MAGIC, len(header)))
+        snapshot.write(header)
+        snapshot.write(body)
+    os.replace(temporary, path)
+
+
+def load_snapshot(path: str, sources: Iterable[str]) -> Optional[Dict[str, Any]]:
+    """
+    Payload of a snapshot, or None if it is missing, unreadable, corrupt or stale
+
+    A snapshot is stale when it was written by another snapshot format or
+    Python version, or when the hash of sources differs from the one
+    recorded at build time. It is corrupt when its body does not match the
+    recorded digest; that is checked before anything is unpickled.
+    """
+    try:
+        with open(path, "rb") as snapshot:
+            data = snapshot.read()
+        magic, header_length = PREFIX.unpack_from(data)
+        if magic != MAGIC:
+            return None
+        header = json.loads(data[PREFIX.size:PREFIX.size + header_length])
+        if (header.get("format") != SNAPSHOT_FORMAT
+                or header.get("python") != list(sys.version_info[:2])
+                or header.get("source_hash") != source_hash(sources)):
+            return None
+        body = memoryview(data)[PREFIX.size + header_length:]
+        if header.get("body_sha256") != hashlib.sha256(body).hexdigest():
+            return None
+        return pickle.loads(body)
+    except Exception:
+        # Whatever went wrong, the source is still there to compile from
+        return None
+
+
+if __name__ == "__main__":
+    import pigeon_mix_calculator_v2
+
+    target = sys.argv[1] if len(sys.argv) > 1 else pigeon_mix_calculator_v2.SNAPSHOT_PATH
+    pigeon_mix_calculator_v2.build_snapshot(target)
+    print(f"Wrote catalog snapshot to {target}")
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Combination ranking for sharded mix searches
+Maps integer ranks to ingredient combinations (combinatorial number system)
+in the same order as itertools.combinations, so the search space can be cut
+into rank ranges without enumerating what comes before each range.
+"""
+
+from math import comb
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+
+def combination_count(n: int, sizes: Iterable[int]) -> int:
+    """Number of combinations of n items over all the given sizes"""
+    return sum(comb(n, k) for k in sizes)
+
+
+def unrank_combination(rank: int, n: int, k: int) -> List[int]:
+    """The combination of k out of range(n) at a lexicographic rank"""
+    combo = []
+    x = 0
+    for i in range(k):
+        while True:
+            count = comb(n - x - 1, k - i - 1)
+            if rank < count:
+                break
+            rank -= count
+            x += 1
+        combo.append(x)
+        x += 1
+    return combo
+
+
+def iter_combination_ranks(n: int, sizes: Iterable[int], start: int = 0,
+                           stop: Optional[int] = None) -> Iterator[Tuple[int, Tuple[int, ...]]]:
+    """
+    Yield (rank, combination) for ranks in [start, stop)
+
+    Ranks run through each size in turn, in itertools.combinations order
+    within a size. Only the first combination of the range is unranked;
+    the rest are stepped to directly.
+    """
+    offset = 0
+    for k in sizes:
+        count = comb(n, k)
+        first = max(start, offset)
+        last = offset + count if stop is None else min(stop, offset + count)
+        if first < last:
+            combo = unrank_combination(first - offset, n, k)
+            for rank in range(first, last):
+                yield rank, tuple(combo)
+                # Step to the next combination in lexicographic order
+                i = k - 1
+                while i >= 0 and combo[i] == n - k + i:
+                    i -= 1
+                if i < 0:
+                    break
+                combo[i] += 1
+                for j in range(i + 1, k):
+                    combo[j] = combo[j - 1] + 1
+        offset += count
+
+
+def shard_ranges(total: int, shards: int) -> List[Tuple[int, int]]:
+    """Split range(total) into at most `shards` contiguous (start, stop) ranges"""
+    shards = max(1, min(shards, total))
+    size, extra = divmod(total, shards)
+    ranges = []
+    start = 0
+    for i in range(shards):
+        stop = start + size + (1 if i < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
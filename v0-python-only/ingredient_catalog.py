@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Ingredient catalog helpers for the Pigeon Mix Calculator
+Groups nutritionally identical inventory items so the optimizer searches one
+pooled ingredient per group instead of every duplicate row.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+# Fields that decide whether two ingredients are interchangeable for scoring
+SIGNATURE_FIELDS = ("category", "protein", "carbs", "fat", "fiber")
+
+
+def nutrient_signature(record: dict) -> Tuple:
+    """Category and nutrient vector of an ingredient record"""
+    return tuple(record[field] for field in SIGNATURE_FIELDS)
+
+
+def group_equivalents(available: Dict[str, dict]) -> Dict[str, List[str]]:
+    """
+    Group available ingredients with identical category and nutrients
+
+    Returns:
+        Dict of representative_name: [member names], keyed by the first
+        member in inventory order
+    """
+    by_signature = {}
+    for name, record in available.items():
+        by_signature.setdefault(nutrient_signature(record), []).append(name)
+    return {members[0]: members for members in by_signature.values()}
+
+
+def _stock(record: dict, increment: Optional[float]) -> float:
+    if increment:
+        return (record["available"] // increment) * increment
+    return record["available"]
+
+
+def pool_available(available: Dict[str, dict], groups: Dict[str, List[str]],
+                   increment: Optional[float] = None) -> Dict[str, dict]:
+    """
+    One pooled ingredient per group, holding the combined stock
+
+    Args:
+        available: Available ingredients with their "available" stock
+        groups: Output of group_equivalents
+        increment: Truncate each member's stock to whole increments first
+    """
+    pooled = {}
+    for representative, members in groups.items():
+        pooled[representative] = {
+            **available[representative],
+            "available": sum(_stock(available[name], increment) for name in members)
+        }
+    return pooled
+
+
+def split_pooled_mix(mix: Dict[str, float], groups: Dict[str, List[str]],
+                     available: Dict[str, dict], increment: Optional[float] = None) -> Dict[str, float]:
+    """
+    Split each pooled amount back across the real items of its group
+
+    Amounts are shared in proportion to stock, so no item exceeds what is
+    on hand. With an increment, shares are whole increments (largest
+    remainder) and still add up to the pooled amount.
+    """
+    result = {}
+    for representative, amount in mix.items():
+        members = groups.get(representative, [representative])
+        if len(members) == 1:
+            result[representative] = amount
+            continue
+
+        stock = [_stock(available[name], increment) for name in members]
+        total_stock = sum(stock)
+        shares = [amount * s / total_stock for s in stock]
+        if increment:
+            split = [(share // increment) * increment for share in shares]
+            missing = round((amount - sum(split)) / increment)
+            order = sorted(range(len(members)), key=lambda i: -(shares[i] - split[i]))
+            for i in order:
+                if missing <= 0:
+                    break
+                if split[i] + increment <= stock[i]:
+                    split[i] += increment
+                    missing -= 1
+            shares = split
+
+        for name, share in zip(members, shares):
+            if share > 0:
+                result[name] = share
+    return result
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Ingredient name resolution for the Pigeon Mix Calculator
+Maps free-form stock sheet names to catalog keys through precompiled
+indexes instead of scanning the catalog: an exact hash map of keys and
+aliases, an index of (singularized) name tokens, a trigram index for
+misspellings, and a memo of names already seen. Matches are ranked
+deterministically, ties going to catalog order.
+"""
+
+from collections import Counter
+from functools import lru_cache
+from itertools import chain
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# Shortest fragment the substring fallback will match
+MIN_FRAGMENT = 3
+# Matches of any method are only used at this confidence (about one edit in four letters)
+MIN_CONFIDENCE = 0.75
+# Weaker matches are not even suggested
+MIN_SUGGESTION_CONFIDENCE = 0.5
+# Entries sharing the most trigrams with a name that get an edit distance check
+TYPO_CANDIDATES = 8
+
+METHODS = ("exact", "alias", "tokens", "substring", "typo")
+
+
+class NameMatch(NamedTuple):
+    """A resolved name: the catalog key, how it matched and how sure the match is"""
+    key: str
+    method: str  # One of METHODS
+    confidence: float  # 1.0 for exact and alias matches
+
+
+def clean_name(name: str) -> str:
+    """Lowercase, trim and join words with underscores, as catalog keys are written"""
+    return name.lower().strip().replace(" ", "_").replace("-", "_")
+
+
+def name_tokens(name: str) -> Tuple[str, ...]:
+    """Words of a cleaned name, singularized so 'peas' and 'pea' share a token"""
+    tokens = []
+    for token in name.split("_"):
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        if token:
+            tokens.append(token)
+    return tuple(tokens)
+
+
+def trigrams(name: str) -> frozenset:
+    """Letter trigrams of a name padded with '$' at both ends"""
+    padded = f"${name}$"
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def edit_distance(a: str, b: str, limit: Optional[int] = None) -> int:
+    """
+    Optimal string alignment distance: insertions, deletions, substitutions and adjacent swaps
+
+    With a limit, gives up as soon as the distance must exceed it and
+    returns limit + 1.
+    """
+    if limit is not None and abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i]
+        char = a[i - 1]
+        for j in range(1, len(b) + 1):
+            distance = previous[j - 1] + (char != b[j - 1])
+            if previous[j] < distance:
+                distance = previous[j] + 1
+            if current[j - 1] < distance:
+                distance = current[j - 1] + 1
+            if i > 1 and j > 1 and char == b[j - 2] and a[i - 2] == b[j - 1] and previous2[j - 2] < distance:
+                distance = previous2[j - 2] + 1
+            current.append(distance)
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class TrigramIndex:
+    """
+    Misspelling matcher over a fixed set of names
+
+    Posting lists of trigrams narrow the names down to the few sharing the
+    most trigrams with the query; only those get an edit distance check,
+    so a lookup costs about the same for a thousand names as for fifty.
+    """
+
+    def __init__(self, names: Iterable[str]):
+        self.names = tuple(names)
+        self.postings = {}
+        for i, name in enumerate(self.names):
+            for trigram in trigrams(name):
+                self.postings.setdefault(trigram, []).append(i)
+
+    def closest(self, name: str, limit: int = TYPO_CANDIDATES) -> List[Tuple[str, float]]:
+        """
+        Indexed names nearest to name with their confidence, in index order
+
+        Only the `limit` names sharing the most trigrams are compared and
+        every one tied at the best confidence is returned. Confidence is
+        1 - edit distance / length of the longer name; once one candidate is
+        scored, the others only need their distance computed while they can
+        still match it.
+        """
+        shared = Counter(chain.from_iterable(self.postings.get(trigram, ()) for trigram in trigrams(name)))
+        scored = []
+        best = None
+        for i, _ in shared.most_common(limit):
+            candidate = self.names[i]
+            longest = max(len(name), len(candidate))
+            cutoff = None if best is None else int((1 - best) * longest + 1e-9)
+            confidence = 1 - edit_distance(name, candidate, cutoff) / longest
+            if best is None or confidence > best:
+                best = confidence
+            scored.append((i, candidate, confidence))
+        return [(candidate, confidence) for _, candidate, confidence in sorted(scored)
+                if confidence >= best - 1e-12]
+
+
+class AliasResolver:
+    """Precompiled resolver from free-form names to catalog keys"""
+
+    def __init__(self, keys: Iterable[str], aliases: Dict[str, str], memo_size: int = 4096):
+        """
+        Args:
+            keys: Catalog keys in catalog order (used to break ties)
+            aliases: Alternative name: catalog key
+            memo_size: Distinct names remembered by match()
+        """
+        self.keys = tuple(keys)
+        self.order = {key: i for i, key in enumerate(self.keys)}
+        self.exact = {key: key for key in self.keys}
+        for alias, key in aliases.items():
+            self.exact.setdefault(clean_name(alias), key)
+
+        # Token set of every key and alias, and which of them use each token
+        self.token_sets = {}
+        self.token_index = {}
+        for name, key in self.exact.items():
+            tokens = frozenset(name_tokens(name))
+            self.token_sets.setdefault(tokens, key)
+            for token in tokens:
+                self.token_index.setdefault(token, []).append((name, key))
+        self.typos = TrigramIndex(self.exact)
+
+        self.memo_size = memo_size
+        self.match = lru_cache(maxsize=memo_size)(self._match)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state["match"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.match = lru_cache(maxsize=self.memo_size)(self._match)
+
+    def resolve(self, name: str) -> str:
+        """Catalog key for a name, or the cleaned name when nothing matches"""
+        match = self.match(clean_name(name))
+        return match.key if self.accepts(match) else clean_name(name)
+
+    @staticmethod
+    def accepts(match: Optional[NameMatch]) -> bool:
+        """True when a match is good enough to use; weaker ones are only suggestions"""
+        return match is not None and match.confidence >= MIN_CONFIDENCE
+
+    def _match(self, name: str) -> Optional[NameMatch]:
+        if name in self.exact:
+            return NameMatch(self.exact[name], "exact" if name in self.order else "alias", 1.0)
+
+        ranked = self.ranked(name, 1)
+        if not ranked or ranked[0].confidence < MIN_SUGGESTION_CONFIDENCE:
+            return None
+        return ranked[0]
+
+    def ranked(self, name: str, limit: int = 5) -> List[NameMatch]:
+        """
+        Best token, substring and misspelling matches for a cleaned name, best first
+
+        Token matches score the Jaccard overlap of their token sets and
+        prefer keys with fewer extra tokens; the substring match is the
+        longest key or alias found inside the name; misspellings score by
+        edit distance. Candidates are ranked by confidence, then by METHODS
+        order, then by catalog order. Misspellings below
+        MIN_SUGGESTION_CONFIDENCE are left out.
+        """
+        tokens = frozenset(name_tokens(name))
+        if tokens in self.token_sets:
+            return [NameMatch(self.token_sets[tokens], "tokens", 1.0)]
+
+        best = {}
+        for token in tokens:
+            for candidate, key in self.token_index.get(token, ()):
+                candidate_tokens = frozenset(name_tokens(candidate))
+                overlap = len(tokens & candidate_tokens) / len(tokens | candidate_tokens)
+                rank = (-overlap, METHODS.index("tokens"), len(candidate_tokens - tokens), self.order[key])
+                if key not in best or rank < best[key]:
+                    best[key] = rank
+
+        # Keys run together with other words, e.g. 'sunflowerseed'
+        substring = self._longest_fragment(name)
+        if substring is not None:
+            key, confidence = substring
+            rank = (-confidence, METHODS.index("substring"), 0, self.order[key])
+            best[key] = min(best.get(key, rank), rank)
+
+        for candidate, confidence in self.typos.closest(name):
+            if confidence < MIN_SUGGESTION_CONFIDENCE:
+                continue
+            key = self.exact[candidate]
+            rank = (-confidence, METHODS.index("typo"), 0, self.order[key])
+            best[key] = min(best.get(key, rank), rank)
+
+        ranked = sorted(best.items(), key=lambda item: item[1])[:limit]
+        return [NameMatch(key, METHODS[rank[1]], -rank[0]) for key, rank in ranked]
+
+    def _longest_fragment(self, name: str) -> Optional[Tuple[str, float]]:
+        for length in range(len(name), MIN_FRAGMENT - 1, -1):
+            for start in range(len(name) - length + 1):
+                key = self.exact.get(name[start:start + length])
+                if key is not None:
+                    return key, length / len(name)
+        return None
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Calculator daemon for the Pigeon Mix Calculator v2
+Keeps the compiled catalog, profiles and result caches warm in one
+long-lived process listening on a Unix domain socket, so scripts that call
+the calculator thousands of times skip interpreter start and catalog setup
+on every call. The protocol is one JSON object per line each way: requests
+are batch_cli.py request lines, replies are its result lines.
+
+Start the daemon, then send requests with the thin client:
+    python mix_daemon.py serve [--socket PATH] [--store results.sqlite3]
+    echo '{"inventory": {"wheat": 5000, "peas": 2000}}' | python mix_daemon.py call
+    python mix_daemon.py call '{"inventory": {"wheat": 5000, "peas": 2000}}'
+
+{"command": "ping"} and {"command": "stats"} requests check the daemon
+and report its cache statistics. The client imports nothing but the
+standard library modules it needs, and any tool that speaks Unix sockets
+(e.g. socat) can be used instead.
+"""
+
+import os
+import socket
+import stat
+import sys
+from typing import Optional
+
+# Without a per-user XDG_RUNTIME_DIR, the default socket lives in this
+# private (0700) directory, never directly in world-writable /tmp
+PRIVATE_DIR = None if os.environ.get("XDG_RUNTIME_DIR") else f"/tmp/pigeon_mix_{os.getuid()}"
+
+# Socket used when neither --socket nor PIGEON_MIX_SOCKET is given
+DEFAULT_SOCKET = os.path.join(os.environ.get("XDG_RUNTIME_DIR") or PRIVATE_DIR, f"pigeon_mix_{os.getuid()}.sock")
+
+
+def socket_path(path: Optional[str] = None) -> str:
+    return path or os.environ.get("PIGEON_MIX_SOCKET") or DEFAULT_SOCKET
+
+
+def make_private_dir(directory: str):
+    """Create a directory only this user can enter, or check that an existing one is"""
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise RuntimeError(f"{directory} is not a private directory of this user")
+
+
+def handle_line(text: str) -> str:
+    """Reply line for one request line"""
+    import json
+
+    import batch_cli
+    import pigeon_mix_calculator_v2
+
+    try:
+        message = json.loads(text)
+    except json.JSONDecodeError:
+        message = None
+    command = message.get("command") if isinstance(message, dict) else None
+    if command == "ping":
+        return json.dumps({"ok": True, "pid": os.getpid()})
+    if command == "stats":
+        return json.dumps({
+            "result_cache": pigeon_mix_calculator_v2.RESULT_CACHE.stats()._asdict(),
+            "proportion_cache": pigeon_mix_calculator_v2.PROPORTION_CACHE.stats()._asdict(),
+            "catalog_source": pigeon_mix_calculator_v2.CATALOG_SOURCE,
+        })
+    if command is not None:
+        return json.dumps({"error": f"Unknown command '{command}'"})
+    _, reply = batch_cli.process_line(1, text)
+    return reply
+
+
+def serve(path: Optional[str] = None, store_path: Optional[str] = None):
+    """
+    Serve requests on a Unix domain socket until interrupted
+
+    Each connection is served by its own thread and may send any number of
+    request lines. A stale socket file left by a dead daemon is replaced;
+    a live daemon on the same path is an error. The socket is created
+    owner-only (mode 0600), with no window in which others can connect.
+    """
+    import json
+    import signal
+    import socketserver
+
+    import batch_cli
+    import pigeon_mix_calculator_v2
+
+    path = socket_path(path)
+    if PRIVATE_DIR is not None and os.path.dirname(path) == PRIVATE_DIR:
+        make_private_dir(PRIVATE_DIR)
+    if os.path.exists(path):
+        if ping(path):
+            raise RuntimeError(f"A calculator daemon is already listening on {path}")
+        os.unlink(path)
+
+    batch_cli.init_worker(store_path)
+    # Warm the name resolver, scorer and caches before the first client
+    handle_line(json.dumps({"inventory": {"wheat": 1000, "peas": 500}, "recipe_card": True}))
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                if not line.strip():
+                    continue
+                try:
+                    text = line.decode("utf-8")
+                except UnicodeDecodeError as error:
+                    reply = json.dumps({"error": f"Request is not UTF-8: {error}"})
+                else:
+                    reply = handle_line(text)
+                self.wfile.write(reply.encode("utf-8") + b"\n")
+                self.wfile.flush()
+
+    class Server(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+    # bind() creates the socket file; the umask makes it 0600 from the start
+    umask = os.umask(0o177)
+    try:
+        server = Server(path, Handler)
+    finally:
+        os.umask(umask)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f"Pigeon mix daemon {os.getpid()} listening on {path} "
+          f"(catalog from {pigeon_mix_calculator_v2.CATALOG_SOURCE})", file=sys.stderr, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+class Client:
+    """Connection to a running daemon; send() can be called any number of times"""
+
+    def __init__(self, path: Optional[str] = None, timeout: Optional[float] = None):
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.settimeout(timeout)
+        self.socket.connect(socket_path(path))
+        self.reader = self.socket.makefile("rb")
+
+    def send_line(self, text: str) -> str:
+        """Reply line to one JSON request line"""
+        self.socket.sendall(text.strip().encode("utf-8") + b"\n")
+        reply = self.reader.readline()
+        if not reply:
+            raise ConnectionError("Daemon closed the connection")
+        return reply.decode("utf-8").rstrip("\n")
+
+    def send(self, request: dict) -> dict:
+        """Reply to one request"""
+        import json
+
+        return json.loads(self.send_line(json.dumps(request)))
+
+    def close(self):
+        self.reader.close()
+        self.socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def ping(path: Optional[str] = None) -> bool:
+    """True when a daemon answers on the socket"""
+    try:
+        with Client(path, timeout=2) as client:
+            return client.send({"command": "ping"}).get("ok", False)
+    except OSError:
+        return False
+
+
+def main(argv: Optional[list] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pigeon mix calculator daemon and client")
+    parser.add_argument("--socket", help=f"Unix socket (default: $PIGEON_MIX_SOCKET or {DEFAULT_SOCKET})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", help="Run the daemon in the foreground")
+    serve_parser.add_argument("--store", default=os.environ.get("PIGEON_MIX_STORE"),
+                              help="Result store database (default: $PIGEON_MIX_STORE, none if unset)")
+    call_parser = commands.add_parser("call", help="Send requests to a running daemon")
+    call_parser.add_argument("request", nargs="?", help="JSON request (default: JSONL requests on stdin)")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        serve(args.socket, args.store)
+        return 0
+
+    lines = [args.request] if args.request else sys.stdin
+    failed = False
+    with Client(args.socket) as client:
+        for line in lines:
+            if not line.strip():
+                continue
+            reply = client.send_line(line)
+            # Quotes inside JSON strings are escaped, so this only matches the key
+            failed = failed or '"error": ' in reply
+            print(reply, flush=True)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
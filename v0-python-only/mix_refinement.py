@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Local-search refinement for pigeon mixes
+Hill-climbs from a sampled mix with gram shifts between ingredients (which
+also add and drop ingredients) and swaps of one ingredient for another.
+Every move keeps the batch weight and the stock caps, and a move is taken
+only when it raises the score.
+"""
+
+import time
+from threading import Event
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Smallest score gain that counts as an improvement
+MIN_GAIN = 1e-12
+
+ScoreBatch = Callable[[List[Dict[str, float]]], List[float]]
+
+
+def neighbour_mixes(mix: Dict[str, float], caps: Dict[str, float], step: float) -> Iterator[Dict[str, float]]:
+    """
+    Every mix one move away from `mix`
+
+    Shift: move `step` grams (or all that is left) from one ingredient to
+    another, adding the receiver if it is new and dropping the giver if it
+    runs out. Swap: replace one ingredient by a new one at the same amount.
+    """
+    for source, amount in mix.items():
+        moved = min(step, amount)
+        for target, cap in caps.items():
+            if target == source or mix.get(target, 0) + moved > cap:
+                continue
+            shifted = dict(mix)
+            if moved < amount:
+                shifted[source] = amount - moved
+            else:
+                del shifted[source]
+            shifted[target] = shifted.get(target, 0) + moved
+            yield shifted
+
+        for target, cap in caps.items():
+            if target in mix or amount > cap:
+                continue
+            yield {target if name == source else name: grams for name, grams in mix.items()}
+
+
+def iter_refinements(mix: Dict[str, float], caps: Dict[str, float], score_batch: ScoreBatch,
+                     step: float, min_step: float = 1, stop_at: Optional[float] = None,
+                     stop: Optional[Event] = None) -> Iterator[Tuple[float, Dict[str, float]]]:
+    """
+    Yield (score, mix) after every improving move, best-improvement first
+
+    The shift size starts at `step` grams and halves whenever no move
+    improves, down to `min_step`. Stops early at stop_at (a time.monotonic()
+    value) or once `stop` is set, checked before each round of moves.
+
+    Args:
+        mix: Starting mix, within caps
+        caps: Stock per ingredient that may appear in the mix
+        score_batch: Scores a list of mixes (e.g. score_mixes)
+        step: Initial shift size in grams
+        min_step: Smallest shift size in grams
+        stop_at: Optional time.monotonic() deadline
+        stop: Optional threading.Event that ends the search when set
+    """
+    current = dict(mix)
+    current_score = score_batch([current])[0]
+    while step >= min_step:
+        if (stop_at is not None and time.monotonic() >= stop_at) or (stop is not None and stop.is_set()):
+            return
+        moves = list(neighbour_mixes(current, caps, step))
+        scores = score_batch(moves) if moves else []
+        best = max(range(len(moves)), key=scores.__getitem__, default=None)
+        if best is not None and scores[best] > current_score + MIN_GAIN:
+            current, current_score = moves[best], scores[best]
+            yield current_score, current
+        else:
+            step /= 2
+
@@ -0,0 +1,549 @@
+#!/usr/bin/env python3
+"""
+Exact solvers for the pigeon mix score
+Pure Python linear programming (bounded simplex) with branch-and-bound over
+the clipped tails of the score terms. No external solver is required.
+"""
+
+import heapq
+import time
+from threading import Event
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+INF = float("inf")
+EPS = 1e-9
+FEASIBILITY_TOLERANCE = 1e-7
+# Continuous amounts this far below the diversity threshold count as excluded
+EXCLUSION_MARGIN = 1e-6
+
+
+class ScoreTerm(NamedTuple):
+    """
+    One weighted term of the mix score
+
+    The term scores a quantity y = sum(coefficients[i] * share[i]) as
+    max(0, min(slope * y + intercept for each piece)). It reaches 1 at `peak`
+    and falls back to 0 at `zero`; beyond `zero` it is clipped at 0.
+    """
+    weight: float
+    coefficients: Tuple[float, ...]
+    pieces: Tuple[Tuple[float, float], ...]
+    peak: float
+    zero: float
+
+    def value(self, y: float) -> float:
+        return max(0.0, min(slope * y + intercept for slope, intercept in self.pieces))
+
+
+def tent_term(weight: float, coefficients: Sequence[float], target: float) -> ScoreTerm:
+    """Term scoring max(0, 1 - |y - target| / target)"""
+    return ScoreTerm(
+        weight, tuple(coefficients),
+        ((1 / target, 0.0), (-1 / target, 2.0)),
+        target, 2 * target
+    )
+
+
+def ceiling_term(weight: float, coefficients: Sequence[float], limit: float) -> ScoreTerm:
+    """Term scoring 1 below `limit`, falling linearly to 0 at twice the limit"""
+    return ScoreTerm(
+        weight, tuple(coefficients),
+        ((0.0, 1.0), (-1 / limit, 2.0)),
+        limit, 2 * limit
+    )
+
+
+class Diversity(NamedTuple):
+    """Diversity bonus: weight * min(1, meaningful ingredients / count)"""
+    weight: float
+    count: int
+    threshold: float
+
+
+class SolverLimitWarning(UserWarning):
+    """An exact solve stopped at its node limit; the mix is the best found, not proven optimal"""
+
+
+class ShortStockWarning(UserWarning):
+    """The stock cannot reach the requested batch weight; the solve used all of it"""
+
+
+class MixSolution(NamedTuple):
+    amounts: List[float]
+    score: float
+    nodes: int
+    optimal: bool = True
+
+
+class LPResult(NamedTuple):
+    status: str
+    x: List[float]
+    objective: float
+    reduced_costs: List[float]
+
+
+# ===== Bounded-variable primal simplex =====
+
+def maximize(c: Sequence[float], rows: Sequence[Tuple[Sequence[float], str, float]],
+             lo: Sequence[float], hi: Sequence[float],
+             max_iterations: int = 10000) -> LPResult:
+    """
+    Solve max c·x subject to linear rows and lo <= x <= hi
+
+    Args:
+        c: Objective coefficients
+        rows: (coefficients, sense, rhs) with sense one of '<=', '>=', '=='
+        lo: Finite lower bounds
+        hi: Upper bounds (may be INF)
+
+    Returns:
+        LPResult; status is 'optimal', 'infeasible', 'unbounded' or
+        'iteration_limit' and reduced_costs are those of the structural columns
+    """
+    n = len(c)
+    m = len(rows)
+    col_lo = [float(v) for v in lo]
+    col_hi = [float(v) for v in hi]
+    if any(col_hi[j] < col_lo[j] - FEASIBILITY_TOLERANCE for j in range(n)):
+        return LPResult("infeasible", [], -INF, [])
+
+    # Slack columns for inequalities, then one artificial column per row
+    n_slack = sum(1 for _, sense, _ in rows if sense != "==")
+    width = n + n_slack + m
+    matrix = []
+    slack = n
+    for coeffs, sense, rhs in rows:
+        row = [float(v) for v in coeffs] + [0.0] * (n_slack + m)
+        if sense != "==":
+            row[slack] = 1.0 if sense == "<=" else -1.0
+            slack += 1
+        matrix.append(row)
+    col_lo += [0.0] * (n_slack + m)
+    col_hi += [INF] * n_slack + [INF] * m
+
+    at_upper = [False] * width
+    values = col_lo[:]
+    basis = []
+    beta = []
+    for i, (coeffs, sense, rhs) in enumerate(rows):
+        residual = rhs - sum(a * values[j] for j, a in enumerate(matrix[i][:n]) if a)
+        sign = 1.0 if residual >= 0 else -1.0
+        matrix[i] = [sign * a for a in matrix[i]]
+        matrix[i][n + n_slack + i] = 1.0
+        basis.append(n + n_slack + i)
+        beta.append(abs(residual))
+
+    artificial = range(n + n_slack, width)
+
+    # Phase 1: drive artificials to zero
+    phase1 = [0.0] * width
+    for j in artificial:
+        phase1[j] = -1.0
+    status, _ = _iterate(matrix, beta, basis, at_upper, phase1, col_lo, col_hi, max_iterations)
+    if status != "optimal":
+        return LPResult(status, [], -INF, [])
+    if sum(beta[i] for i in range(m) if basis[i] >= n + n_slack) > FEASIBILITY_TOLERANCE:
+        return LPResult("infeasible", [], -INF, [])
+
+    for j in artificial:
+        col_hi[j] = 0.0
+
+    # Phase 2: original objective
+    phase2 = list(c) + [0.0] * (n_slack + m)
+    status, reduced = _iterate(matrix, beta, basis, at_upper, phase2, col_lo, col_hi, max_iterations)
+    if status != "optimal":
+        return LPResult(status, [], -INF, [])
+
+    x = [col_hi[j] if at_upper[j] else col_lo[j] for j in range(width)]
+    for i, j in enumerate(basis):
+        x[j] = beta[i]
+    x = x[:n]
+    return LPResult("optimal", x, sum(cj * xj for cj, xj in zip(c, x)), reduced[:n])
+
+
+def _iterate(matrix: List[List[float]], beta: List[float], basis: List[int],
+             at_upper: List[bool], cost: Sequence[float],
+             col_lo: Sequence[float], col_hi: Sequence[float],
+             max_iterations: int) -> Tuple[str, List[float]]:
+    """Run simplex pivots in place until optimal; returns (status, reduced costs)"""
+    m = len(matrix)
+    width = len(cost)
+    reduced = list(cost)
+    for i, j in enumerate(basis):
+        cb = cost[j]
+        if cb:
+            row = matrix[i]
+            reduced = [r - cb * a for r, a in zip(reduced, row)]
+    in_basis = [False] * width
+    for j in basis:
+        in_basis[j] = True
+
+    degenerate = 0
+    for _ in range(max_iterations):
+        # Entering column: Dantzig's rule, Bland's rule after a degenerate streak
+        entering = -1
+        best = EPS
+        for j in range(width):
+            if in_basis[j] or col_hi[j] - col_lo[j] <= EPS:
+                continue
+            d = reduced[j]
+            gain = -d if at_upper[j] else d
+            if gain > best:
+                entering, best = j, gain
+                if degenerate > 50:
+                    break
+        if entering < 0:
+            return "optimal", reduced
+
+        direction = -1.0 if at_upper[entering] else 1.0
+        step = col_hi[entering] - col_lo[entering]
+        leave = -1
+        leave_to_upper = False
+        for i in range(m):
+            alpha = matrix[i][entering] * direction
+            j = basis[i]
+            if alpha > EPS:
+                limit = max(0.0, beta[i] - col_lo[j]) / alpha
+                to_upper = False
+            elif alpha < -EPS and col_hi[j] < INF:
+                limit = max(0.0, col_hi[j] - beta[i]) / -alpha
+                to_upper = True
+            else:
+                continue
+            if limit < step - EPS or (leave >= 0 and limit <= step + EPS and j < basis[leave]):
+                step, leave, leave_to_upper = limit, i, to_upper
+        if step == INF:
+            return "unbounded", reduced
+        degenerate = degenerate + 1 if step <= EPS else 0
+
+        for i in range(m):
+            a = matrix[i][entering]
+            if a:
+                beta[i] -= a * direction * step
+
+        if leave < 0:
+            at_upper[entering] = not at_upper[entering]
+            continue
+
+        start = col_hi[entering] if at_upper[entering] else col_lo[entering]
+        leaving = basis[leave]
+        in_basis[leaving] = False
+        at_upper[leaving] = leave_to_upper
+        in_basis[entering] = True
+        at_upper[entering] = False
+        basis[leave] = entering
+        beta[leave] = start + direction * step
+
+        pivot_row = matrix[leave]
+        pivot = pivot_row[entering]
+        pivot_row = [a / pivot for a in pivot_row]
+        matrix[leave] = pivot_row
+        for i in range(m):
+            if i != leave:
+                f = matrix[i][entering]
+                if f:
+                    matrix[i] = [a - f * b for a, b in zip(matrix[i], pivot_row)]
+        f = reduced[entering]
+        if f:
+            reduced = [r - f * b for r, b in zip(reduced, pivot_row)]
+    return "iteration_limit", reduced
+
+
+# ===== Mix model =====
+
+def _term_quantity(term: ScoreTerm, amounts: Sequence[float], total: float) -> float:
+    return sum(a * x for a, x in zip(term.coefficients, amounts)) / total
+
+
+def meaningful_count(amounts: Sequence[float], threshold: float) -> int:
+    """Number of ingredients whose amount reaches the meaningful-inclusion threshold"""
+    return sum(1 for x in amounts if x >= threshold - FEASIBILITY_TOLERANCE)
+
+
+def evaluate_terms(terms: Sequence[ScoreTerm], amounts: Sequence[float],
+                   diversity: Optional[Diversity] = None) -> float:
+    """Weighted score of a mix given as per-ingredient amounts"""
+    total = sum(amounts)
+    if total <= 0:
+        return 0.0
+    score = sum(t.weight * t.value(_term_quantity(t, amounts, total)) for t in terms)
+    if diversity:
+        score += diversity.weight * min(1.0, meaningful_count(amounts, diversity.threshold) / diversity.count)
+    return score
+
+
+def _mix_lp(terms: Sequence[ScoreTerm], lower: Sequence[float], upper: Sequence[float],
+            total: float, regions: Sequence[str]):
+    """
+    Build the LP over gram amounts x and term scores s
+
+    Each region is 'free' (use the concave envelope of the term over its
+    reachable range), 'tail' (y <= zero, exact concave term) or 'clip'
+    (y >= zero, term fixed at 0).
+    """
+    n = len(upper)
+    k = len(terms)
+    c = [0.0] * n + [t.weight for t in terms]
+    lo = list(lower) + [0.0] * k
+    hi = list(upper) + [1.0] * k
+    rows = [([1.0] * n + [0.0] * k, "==", total)]
+
+    for index, (term, region) in enumerate(zip(terms, regions)):
+        scaled = [a / total for a in term.coefficients]
+        if region == "clip":
+            hi[n + index] = 0.0
+            rows.append((scaled + [0.0] * k, ">=", term.zero))
+            continue
+        if region == "tail":
+            rows.append((scaled + [0.0] * k, "<=", term.zero))
+        pieces = list(term.pieces)
+        reach = max((a for a, cap in zip(term.coefficients, upper) if cap > 0), default=0.0)
+        if region == "free" and reach > term.zero:
+            # Concave envelope: falling line from the peak to zero at the reachable maximum
+            span = reach - term.peak
+            pieces = [p for p in pieces if p[0] >= 0] + [(-1 / span, reach / span)]
+        for slope, intercept in pieces:
+            if slope == 0:
+                hi[n + index] = min(hi[n + index], intercept)
+                continue
+            row = [-slope * a for a in scaled] + [0.0] * k
+            row[n + index] = 1.0
+            rows.append((row, "<=", intercept))
+    return c, rows, lo, hi
+
+
+def _diversity_bonus(diversity: Diversity, amounts: Sequence[float], upper: Sequence[float],
+                     reduced_costs: Sequence[float]) -> Tuple[float, List[Tuple[float, int]]]:
+    """
+    Upper bound on the diversity bonus reachable from an LP node
+
+    Raising x[i] to the threshold costs at least -reduced_cost[i] per gram
+    (the LP value is concave in its bounds), so ingredients are worth adding
+    only while their cost is below the per-ingredient bonus.
+
+    Returns:
+        (bonus bound, [(cost, index)] for ingredients still below the threshold)
+    """
+    share = diversity.weight / diversity.count
+    costs = []
+    pending = []
+    for i, (x, cap) in enumerate(zip(amounts, upper)):
+        if cap < diversity.threshold - FEASIBILITY_TOLERANCE:
+            continue
+        shortfall = diversity.threshold - x
+        if shortfall <= FEASIBILITY_TOLERANCE:
+            costs.append(0.0)
+            continue
+        cost = max(0.0, -reduced_costs[i]) * shortfall
+        costs.append(cost)
+        pending.append((cost, i))
+    costs.sort()
+    bonus = sum(max(0.0, share - cost) for cost in costs[:diversity.count])
+    pending.sort()
+    return bonus, pending
+
+
+def _round_amounts(amounts: Sequence[float], lower: Sequence[float], upper: Sequence[float],
+                   total: float, increment: float) -> List[float]:
+    """Round to whole increments within bounds, keeping the exact total (largest remainder)"""
+    units = [x / increment for x in amounts]
+    rounded = [max(lo, min(hi, int(u + FEASIBILITY_TOLERANCE) * increment))
+               for u, lo, hi in zip(units, lower, upper)]
+    missing = round((total - sum(rounded)) / increment)
+    order = sorted(range(len(units)), key=lambda i: (-(units[i] - int(units[i] + FEASIBILITY_TOLERANCE)), i))
+    for i in order:
+        if missing <= 0:
+            break
+        if rounded[i] + increment <= upper[i] + FEASIBILITY_TOLERANCE:
+            rounded[i] += increment
+            missing -= 1
+    return rounded
+
+
+def _iter_branch_and_bound(terms: Sequence[ScoreTerm], caps: Sequence[float], total: float,
+                           increment: Optional[float], diversity: Optional[Diversity],
+                           gap: float, max_nodes: int, deadline: Optional[float] = None,
+                           stop: Optional[Event] = None) -> Iterator[MixSolution]:
+    """
+    Best-first branch-and-bound shared by the continuous and integer solvers
+
+    Yields every improving incumbent with optimal=False, then the final
+    incumbent once more, with optimal=True when the search completed within
+    max_nodes and the deadline (a time.monotonic() value), and without the
+    stop event being set. The root node is always solved, so a feasible
+    model yields at least once.
+
+    Branching order: clipped/unclipped term tails, then meaningful inclusion
+    of an ingredient (x >= threshold or x <= threshold - increment), then
+    fractional amounts (floor/ceil).
+    """
+    n = len(caps)
+    upper = [min(cap, total) for cap in caps]
+    if total <= 0 or sum(upper) < total - FEASIBILITY_TOLERANCE:
+        return
+
+    best_amounts = None
+    best_score = -INF
+    nodes = 0
+    counter = 1
+    optimal = True
+    heap = [(-INF, 0, ("free",) * len(terms), [0.0] * n, upper)]
+    while heap:
+        neg_bound, _, regions, lo, hi = heapq.heappop(heap)
+        if -neg_bound <= best_score + gap:
+            break
+        stopped = nodes and ((deadline is not None and time.monotonic() >= deadline)
+                             or (stop is not None and stop.is_set()))
+        if nodes >= max_nodes or stopped:
+            optimal = False
+            break
+        c, rows, col_lo, col_hi = _mix_lp(terms, lo, hi, total, regions)
+        result = maximize(c, rows, col_lo, col_hi)
+        nodes += 1
+        if result.status != "optimal":
+            continue
+
+        amounts = [max(0.0, v) for v in result.x[:n]]
+        bound = result.objective
+        pending = []
+        if diversity:
+            bonus, pending = _diversity_bonus(diversity, amounts, hi, result.reduced_costs)
+            bound += bonus
+        if bound <= best_score + gap:
+            continue
+
+        candidate = amounts
+        if increment:
+            candidate = _round_amounts(amounts, lo, hi, total, increment)
+        score = evaluate_terms(terms, candidate, diversity)
+        if score > best_score:
+            best_amounts, best_score = candidate, score
+            yield MixSolution(best_amounts, best_score, nodes, False)
+        if bound <= best_score + gap:
+            continue
+
+        children = []
+        overstated, branch = EPS, -1
+        for index, term in enumerate(terms):
+            if regions[index] != "free":
+                continue
+            y = _term_quantity(term, amounts, total)
+            excess = result.x[n + index] - term.value(y)
+            if excess > overstated:
+                overstated, branch = excess, index
+        if branch >= 0:
+            for region in ("tail", "clip"):
+                children.append((regions[:branch] + (region,) + regions[branch + 1:], lo, hi))
+        elif pending and pending[0][0] < diversity.weight / diversity.count:
+            i = pending[0][1]
+            included = lo[:]
+            included[i] = diversity.threshold
+            excluded = hi[:]
+            excluded[i] = diversity.threshold - (increment or EXCLUSION_MARGIN)
+            children.append((regions, included, hi))
+            children.append((regions, lo, excluded))
+        elif increment:
+            fractions = [(abs(x / increment - round(x / increment)), i) for i, x in enumerate(amounts)]
+            fraction, i = max(fractions)
+            if fraction > FEASIBILITY_TOLERANCE:
+                floor = int(amounts[i] / increment) * increment
+                below = hi[:]
+                below[i] = floor
+                above = lo[:]
+                above[i] = floor + increment
+                children.append((regions, lo, below))
+                children.append((regions, above, hi))
+
+        for child_regions, child_lo, child_hi in children:
+            heapq.heappush(heap, (-bound, counter, child_regions, child_lo, child_hi))
+            counter += 1
+
+    if best_amounts is not None:
+        yield MixSolution(best_amounts, best_score, nodes, optimal)
+
+
+def _branch_and_bound(*args, **kwargs) -> Optional[MixSolution]:
+    """Final incumbent of _iter_branch_and_bound, or None when infeasible"""
+    solution = None
+    for solution in _iter_branch_and_bound(*args, **kwargs):
+        pass
+    return solution
+
+
+def solve_continuous(terms: Sequence[ScoreTerm], caps: Sequence[float], total: float,
+                     diversity: Optional[Diversity] = None, gap: float = EPS,
+                     max_nodes: int = 10000, deadline: Optional[float] = None) -> Optional[MixSolution]:
+    """
+    Provably best continuous mix for the score terms
+
+    Maximizes sum(weight * term) over gram amounts with 0 <= x[i] <= caps[i]
+    and sum(x) == total, plus the diversity bonus when one is given (an
+    ingredient counts from diversity.threshold grams upwards). Terms are
+    concave up to their clipping point, so a best-first branch-and-bound
+    over clipped/unclipped tails closes the gap left by the concave
+    envelope; without diversity usually only the root LP is needed. With
+    diversity, ingredients are branched into and out of the count as in
+    solve_integer.
+
+    Args:
+        terms: Score terms (see ScoreTerm)
+        caps: Stock per ingredient
+        total: Batch weight
+        diversity: Diversity bonus definition, or None
+        gap: Absolute score tolerance for pruning
+        max_nodes: Node budget; when exceeded the incumbent is returned
+            with optimal=False
+        deadline: time.monotonic() value after which the incumbent is
+            returned with optimal=False
+
+    Returns:
+        MixSolution, or None when the caps cannot reach `total`
+    """
+    return _branch_and_bound(terms, caps, total, None, diversity, gap, max_nodes, deadline)
+
+
+def solve_integer(terms: Sequence[ScoreTerm], caps: Sequence[float], total: float,
+                  increment: float = 1, diversity: Optional[Diversity] = None,
+                  gap: float = 1e-4, max_nodes: int = 5000,
+                  deadline: Optional[float] = None) -> Optional[MixSolution]:
+    """
+    Best mix in whole increments, including the meaningful-diversity bonus
+
+    Implements the integer model of the constrained-solver specification:
+    x[i] = increment * n[i] with 0 <= x[i] <= caps[i] and sum(x) == total.
+    An ingredient counts towards diversity only when x[i] >= threshold.
+    LP relaxations bound every node; reduced costs bound what adding an
+    ingredient can gain, which prunes most ingredient subsets.
+
+    Args:
+        terms: Score terms (see ScoreTerm)
+        caps: Stock per ingredient, already truncated to whole increments
+        total: Achievable weight, a whole number of increments
+        increment: Computation increment q in grams
+        diversity: Diversity bonus definition, or None
+        gap: Absolute score tolerance for pruning; the score lies in
+            [0, 1], so the default matches a 0.01% relative MIP gap
+        max_nodes: Node budget; when exceeded the incumbent is returned
+            with optimal=False
+        deadline: time.monotonic() value after which the incumbent is
+            returned with optimal=False
+
+    Returns:
+        MixSolution, or None when the caps cannot reach `total`
+    """
+    return _branch_and_bound(terms, caps, total, increment, diversity, gap, max_nodes, deadline)
+
+
+def iter_integer_solutions(terms: Sequence[ScoreTerm], caps: Sequence[float], total: float,
+                           increment: float = 1, diversity: Optional[Diversity] = None,
+                           gap: float = 1e-4, max_nodes: int = 5000, deadline: Optional[float] = None,
+                           stop: Optional[Event] = None) -> Iterator[MixSolution]:
+    """
+    Anytime form of solve_integer
+
+    Yields each improving incumbent as soon as it is found; the last one
+    yielded is what solve_integer returns. Nothing is yielded when the caps
+    cannot reach `total`. Setting `stop` (a threading.Event) ends the search
+    like the deadline does.
+    """
+    return _iter_branch_and_bound(terms, caps, total, increment, diversity, gap, max_nodes, deadline, stop)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Immutable result types for the Pigeon Mix Calculator
+Mix is a read-only ingredient -> grams mapping; MixAnalysis computes the
+nutrition, category ratios and score of one mix against one profile on
+first use and keeps them, so warnings, suggestions and the recipe card all
+share a single analysis. CalculationRequest and CalculationResult are the
+immutable input and output of the stateless calculate() core.
+"""
+
+from collections.abc import Mapping
+from datetime import date
+from types import MappingProxyType
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple
+
+from compiled_catalog import CompiledCatalog
+from scoring_profiles import CompiledProfile
+
+_UNSET = object()
+
+
+class Mix(Mapping):
+    """Read-only mapping of ingredient name to grams; compares equal to an equal dict"""
+
+    __slots__ = ("_amounts", "_total")
+
+    def __init__(self, amounts: Mapping):
+        object.__setattr__(self, "_amounts", dict(amounts))
+        object.__setattr__(self, "_total", _UNSET)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Mix is immutable")
+
+    def __getitem__(self, name: str) -> float:
+        return self._amounts[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._amounts)
+
+    def __len__(self) -> int:
+        return len(self._amounts)
+
+    def __repr__(self) -> str:
+        return f"Mix({self._amounts!r})"
+
+    def __reduce__(self):
+        return Mix, (self._amounts,)
+
+    @property
+    def total(self) -> float:
+        """Batch weight in grams"""
+        if self._total is _UNSET:
+            object.__setattr__(self, "_total", sum(self._amounts.values()))
+        return self._total
+
+    def to_dict(self) -> Dict[str, float]:
+        """A mutable copy as a plain dict"""
+        return dict(self._amounts)
+
+
+class MixAnalysis:
+    """Nutrition, category ratios and score of a Mix, each computed once on first use"""
+
+    __slots__ = ("mix", "catalog", "profile", "_nutrition", "_categories", "_score")
+
+    def __init__(self, mix: Mix, catalog: CompiledCatalog, profile: CompiledProfile):
+        """
+        Args:
+            mix: The mix to analyze
+            catalog: Compiled ingredient catalog
+            profile: Compiled target profile to score against
+        """
+        for name, value in (("mix", mix), ("catalog", catalog), ("profile", profile),
+                            ("_nutrition", _UNSET), ("_categories", _UNSET), ("_score", _UNSET)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("MixAnalysis is immutable")
+
+    @property
+    def total(self) -> float:
+        """Batch weight in grams"""
+        return self.mix.total
+
+    @property
+    def nutrition(self) -> Mapping:
+        """Nutrient percentages, as calculate_nutrition returns them (read-only)"""
+        if self._nutrition is _UNSET:
+            ids, amounts = self.catalog.pack(self.mix)
+            nutrition = self.catalog.nutrition(ids, amounts, self.total)
+            object.__setattr__(self, "_nutrition", MappingProxyType(nutrition))
+        return self._nutrition
+
+    @property
+    def categories(self) -> Mapping:
+        """Category percentages, as calculate_category_ratios returns them (read-only)"""
+        if self._categories is _UNSET:
+            ids, amounts = self.catalog.pack(self.mix)
+            categories = self.catalog.category_ratios(ids, amounts, self.total)
+            object.__setattr__(self, "_categories", MappingProxyType(categories))
+        return self._categories
+
+    @property
+    def score(self) -> float:
+        """Profile score, as score_mix returns it"""
+        if self._score is _UNSET:
+            object.__setattr__(self, "_score", self.profile.score(self.nutrition, self.categories, len(self.mix)))
+        return self._score
+
+
+class CalculationRequest(NamedTuple):
+    """Everything one calculation depends on, as an immutable value"""
+    inventory: Mapping
+    situation: str = "maintenance"
+    target_weight: float = 1000
+    engine: str = "sample"
+    seed: Optional[int] = None
+    card_date: Optional[date] = None
+    deadline: Optional[float] = None
+    use_cache: bool = True
+    workers: int = 1
+
+
+class CalculationResult(NamedTuple):
+    """A finished calculation: the mix, its recipe card and the notes on it"""
+    mix: Mix
+    recipe_card: str
+    warnings: Tuple[Tuple[str, str], ...]
+    suggestions: Tuple[str, ...]
+    herb_recommendations: Tuple[str, ...]
@@ -4,10 +4,43 @@ Pigeon Seed Mix Calculator v2.0
 Enhanced with expanded ingredients and herb/supplement recommendations
 """
 
-from datetime import datetime
-from typing import Dict, List, Tuple
+from array import array
+import atexit
+from datetime import date, datetime
+import os
+from importlib.util import find_spec
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 import itertools
-from expanded_ingredients import INGREDIENTS, HERBS_SUPPLEMENTS, HERB_RECOMMENDATIONS
+import random
+from threading import Event, Lock
+import time
+from warnings import warn
+from combination_ranks import combination_count, shard_ranges
+from catalog_snapshot import load_snapshot, write_snapshot
+from compiled_catalog import CompiledCatalog, PackedMix
+from ingredient_names import AliasResolver, clean_name
+from ingredient_catalog import group_equivalents, pool_available, split_pooled_mix
+from mix_refinement import iter_refinements
+from mix_types import CalculationRequest, CalculationResult, Mix, MixAnalysis
+from result_cache import ResultCache
+from scoring_profiles import CompiledProfile, compile_profiles
+import shard_search
+from shard_search import keep_top, sorted_top
+from mix_solver import (
+    Diversity, MixSolution, ScoreTerm, ShortStockWarning, SolverLimitWarning, ceiling_term,
+    iter_integer_solutions, solve_continuous, tent_term
+)
+
+# Process pools, NumPy, SQLite and shared memory are imported where first used
+if TYPE_CHECKING:
+    from concurrent.futures import Executor, ProcessPoolExecutor
+    from batch_scoring import BatchScorer
+    from result_store import ResultStore
+    from shared_catalog import CatalogHandle, SharedCatalog
+
+# Batches are scored by batch_scoring when NumPy is installed; the one
+# availability check, so batch_scoring itself simply requires NumPy
+HAVE_NUMPY = find_spec("numpy") is not None
 
 # Target profiles for different situations
 PROFILES = {
@@ -58,75 +91,253 @@ PROFILES = {
     }
 }
 
+# Weights of each component in score_mix
+SCORE_WEIGHTS = {
+    "protein": 0.30,
+    "carbs": 0.25,
+    "fat": 0.15,
+    "fiber": 0.10,
+    "category": 0.15,
+    "diversity": 0.05,
+}
+DIVERSITY_COUNT = 5  # Ingredients needed for the full diversity bonus
+
+# Common names and spellings of catalog ingredients
+INGREDIENT_ALIASES = {
+    "corn": "corn_yellow",
+    "yellow_corn": "corn_yellow",
+    "white_corn": "corn_white",
+    "flax": "flaxseed",
+    "field_peas": "peas_field",
+    "canada_peas": "peas_canada",
+    "canadian_peas": "peas_canada",
+    "pea": "peas",
+    "mung": "mung_beans",
+    "bean": "beans",
+    "lentil": "lentils",
+    "sunflower_seed": "sunflower",
+    "safflower_seed": "safflower",
+    "hemp_seed": "hemp",
+    "chia_seed": "chia",
+    "sesame_seed": "sesame",
+    "linum": "linseed",
+    "rapeseed": "canola",
+    "nyjer": "niger",
+    "thistle": "niger",
+    "pumpkin": "pumpkin_seeds",
+    "pepita": "pepitas",
+}
+
+# Integer model of docs/optimization/issue-122-constrained-solver-spec.md
+INCREMENT = 1  # Computation increment q in grams
+MEANINGFUL_AMOUNT = 5  # Meaningful-inclusion threshold d in grams
+LP_NODE_LIMIT = 10000  # Branch-and-bound nodes before the 'lp' engine gives up proving
+MILP_NODE_LIMIT = 5000  # Branch-and-bound nodes before the 'milp' engine gives up proving
+
+# Optimization engines accepted by optimize_mix
+ENGINES = ("sample", "lp", "milp")
+
+# Bump when an engine's model changes, so stored results of the old one are purged
+ENGINE_REVISION = 3
+
+# Candidates scored per vectorized batch when NumPy is available
+BATCH_SIZE = 4096
+
+# Random ratio variations sampled per ingredient combination
+CANDIDATE_VARIATIONS = 10
+
+# Rank shards per worker process, for load balancing
+SHARDS_PER_WORKER = 4
+
+# Candidates scored between deadline checks in anytime searches
+ANYTIME_BATCH_SIZE = 256
+
+# Process-wide cache of calculate() results; resize with RESULT_CACHE.resize()
+RESULT_CACHE = ResultCache(maxsize=256)
+
+# NumPy batch scorers by situation, built on first use and shared by every calculator
+BATCH_SCORERS: Dict[str, "BatchScorer"] = {}
+
+# CATALOG in shared memory for process pool workers; see shared_catalog()
+SHARED_CATALOG: Optional["SharedCatalog"] = None
+
+# multiprocessing start method of sharded search workers; None for the platform default
+POOL_CONTEXT: Optional[str] = None
+
+# (pool key, executor) of sharded searches, reused across calls; see search_pool()
+SEARCH_POOL: Optional[Tuple[tuple, "ProcessPoolExecutor"]] = None
+SEARCH_POOL_LOCK = Lock()
+
+# Identical calculate_async() requests in flight share one computation; a
+# singleflight.SingleFlight made on first use, so asyncio loads only for it
+INFLIGHT = None
+
+# Process-wide cache of 'lp' solutions as (batch weight, mix), reused scaled
+# down for smaller batches where that is still optimal; see scaled_solution()
+PROPORTION_CACHE = ResultCache(maxsize=256)
+
+# Engines cached in PROPORTION_CACHE. Sampling and the integer model depend
+# on the batch size throughout; RESULT_CACHE covers their repeat requests
+CACHED_ENGINES = ("lp",)
+
+# Engines that search equivalent ingredients as one pooled ingredient. The
+# 'lp' model sees every item: equivalent items count separately towards
+# diversity, which a pooled ingredient would hide from it
+POOLED_ENGINES = ("sample", "milp")
+
+# Local-search refinement of sampled mixes
+REFINE_TOP = 3  # Best starting points: sampled mixes and the 'lp' solution
+REFINE_STEP = 0.1  # Initial gram shift, as a fraction of the batch
+REFINE_MIN_STEP = 1  # Smallest gram shift
+
+# Source files the compiled catalog below is derived from
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+SNAPSHOT_SOURCES = tuple(os.path.join(SOURCE_DIR, name) for name in (
+    "expanded_ingredients.py", os.path.basename(__file__), "catalog_snapshot.py", "compiled_catalog.py",
+    "ingredient_names.py", "result_store.py", "scoring_profiles.py",
+))
+
+# Precompiled catalog loaded at startup while its sources are unchanged;
+# written by build_snapshot(). It is unpickled, so it is only ever read
+# from next to the code, never from a configurable path
+SNAPSHOT_PATH = os.path.join(SOURCE_DIR, "pigeon_mix_catalog.snapshot")
+
+
+def compile_catalog() -> Dict[str, Any]:
+    """Ingredient data and everything derived from it, built from the Python source"""
+    from expanded_ingredients import INGREDIENTS
+    from result_store import catalog_version
+
+    return {
+        "INGREDIENTS": INGREDIENTS,
+        "CATALOG": CompiledCatalog(INGREDIENTS),
+        "COMPILED_PROFILES": compile_profiles(PROFILES, SCORE_WEIGHTS, DIVERSITY_COUNT),
+        "NAME_RESOLVER": AliasResolver(INGREDIENTS, INGREDIENT_ALIASES),
+        "CATALOG_VERSION": catalog_version(
+            INGREDIENTS, PROFILES, SCORE_WEIGHTS, DIVERSITY_COUNT, INCREMENT, MEANINGFUL_AMOUNT,
+            CANDIDATE_VARIATIONS, REFINE_TOP, REFINE_STEP, REFINE_MIN_STEP, ENGINE_REVISION
+        ),
+    }
+
+
+_snapshot = load_snapshot(SNAPSHOT_PATH, SNAPSHOT_SOURCES)
+_compiled = _snapshot if _snapshot is not None else compile_catalog()
+
+# Where this process got its catalog from: 'snapshot' or 'source'
+CATALOG_SOURCE = "snapshot" if _snapshot is not None else "source"
+
+INGREDIENTS: Dict[str, dict] = _compiled["INGREDIENTS"]
+
+# INGREDIENTS interned to integer IDs with array-backed nutrient columns
+CATALOG: CompiledCatalog = _compiled["CATALOG"]
+
+# PROFILES compiled once for scoring; shared by every calculator and worker
+COMPILED_PROFILES: Dict[str, CompiledProfile] = _compiled["COMPILED_PROFILES"]
+
+# Indexed name -> catalog key resolver, built once per process
+NAME_RESOLVER: AliasResolver = _compiled["NAME_RESOLVER"]
+
+# Everything a stored result depends on; persistent results from any other
+# version are discarded
+CATALOG_VERSION: str = _compiled["CATALOG_VERSION"]
+del _snapshot, _compiled
+
+# Persistent result store shared across processes; see open_result_store()
+RESULT_STORE: Optional["ResultStore"] = None
+
+
+def herb_data() -> Tuple[Dict[str, dict], Dict[str, dict]]:
+    """
+    (HERBS_SUPPLEMENTS, HERB_RECOMMENDATIONS), imported on first use
+    
+    Mix-only callers never render herb sections, so the herb database is
+    kept out of import time and memory until a report needs it.
+    """
+    from herbs_supplements import HERBS_SUPPLEMENTS, HERB_RECOMMENDATIONS
+    return HERBS_SUPPLEMENTS, HERB_RECOMMENDATIONS
+
+
+def __getattr__(name: str):
+    # HERBS_SUPPLEMENTS and HERB_RECOMMENDATIONS stay importable from here
+    if name == "HERBS_SUPPLEMENTS":
+        return herb_data()[0]
+    if name == "HERB_RECOMMENDATIONS":
+        return herb_data()[1]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 class PigeonMixCalculator:
-    def __init__(self, inventory: Dict[str, float], situation: str = "maintenance"):
+    def __init__(self, inventory: Dict[str, float], situation: str = "maintenance",
+                 seed: Optional[int] = None, rng: Optional[random.Random] = None):
         """
         Initialize calculator with inventory and situation
         
         Args:
             inventory: Dict of ingredient_name: amount_in_grams
-            situation: One of 'maintenance', 'racing', 'breeding', 'molting', 'winter'
+            situation: One of 'maintenance', 'racing', 'breeding', 'molting',
+                'winter'; anything else is treated as 'maintenance'
+            seed: Seed for every sampling run; identical inputs and seed give
+                identical mixes
+            rng: Random generator to draw a run seed from when no seed is set
         """
         self.inventory = {k.lower(): v for k, v in inventory.items()}
-        self.situation = situation.lower()
-        self.profile = PROFILES.get(self.situation, PROFILES["maintenance"])
+        self.situation = situation.lower() if situation.lower() in PROFILES else "maintenance"
+        self.profile = PROFILES[self.situation]
+        self.compiled_profile = COMPILED_PROFILES[self.situation]
+        self.seed = seed
+        self.rng = rng if rng is not None else random.Random()
         self.warnings = []
         self.suggestions = []
         self.herb_recommendations = []
         
     def normalize_ingredient_name(self, name: str) -> str:
         """Try to match ingredient name to database"""
-        name = name.lower().strip().replace(" ", "_").replace("-", "_")
-        
-        # Direct match
-        if name in INGREDIENTS:
-            return name
-            
-        # Common variations
-        variations = {
-            "corn": "corn_yellow",
-            "yellow_corn": "corn_yellow",
-            "white_corn": "corn_white",
-            "flax": "flaxseed",
-            "field_peas": "peas_field",
-            "canada_peas": "peas_canada",
-            "canadian_peas": "peas_canada",
-            "pea": "peas",
-            "mung": "mung_beans",
-            "bean": "beans",
-            "lentil": "lentils",
-            "sunflower_seed": "sunflower",
-            "safflower_seed": "safflower",
-            "linum": "linseed",
-            "rapeseed": "canola",
-            "nyjer": "niger",
-            "thistle": "niger",
-            "pumpkin": "pumpkin_seeds",
-            "pepita": "pepitas",
-        }
+        return NAME_RESOLVER.resolve(name)
+    
+    def name_warnings(self) -> List[Tuple[str, str]]:
+        """
+        Warnings for stocked inventory names that were guessed or ignored
         
-        if name in variations:
-            return variations[name]
-            
-        # Fuzzy matching for common patterns
-        for key in INGREDIENTS.keys():
-            if name in key or key in name:
-                return key
-                
-        return name
+        Names read as an ingredient by a guess (at MIN_CONFIDENCE or more)
+        are reported with that ingredient; names without a usable match are
+        reported as ignored, with the closest suggestion when there is one,
+        so every percentage shown below MIN_CONFIDENCE was rejected.
+        """
+        warnings = []
+        for name, amount in self.inventory.items():
+            if amount <= 0:
+                continue
+            match = NAME_RESOLVER.match(clean_name(name))
+            if match is None:
+                warnings.append(("WARNING", f"Unknown ingredient '{name}' ignored"))
+            elif not NAME_RESOLVER.accepts(match):
+                warnings.append(("WARNING", f"Unknown ingredient '{name}' ignored - did you mean "
+                                            f"{match.key.replace('_', ' ')}? ({match.confidence:.0%} match)"))
+            elif match.confidence < 1:
+                warnings.append(("WARNING", f"'{name}' read as {match.key.replace('_', ' ')} "
+                                            f"({match.confidence:.0%} match)"))
+        return warnings
     
-    def get_available_ingredients(self) -> Dict[str, dict]:
-        """Get available ingredients from inventory"""
-        available = {}
+    def normalized_inventory(self) -> Dict[str, float]:
+        """
+        Known ingredients with stock, in catalog order
+        
+        Names are normalized and aliases of one ingredient are merged by
+        adding their amounts, so equivalent stock sheets give equal results.
+        """
+        stock = {}
         for name, amount in self.inventory.items():
             normalized = self.normalize_ingredient_name(name)
             if normalized in INGREDIENTS and amount > 0:
-                available[normalized] = {
-                    **INGREDIENTS[normalized],
-                    "available": amount
-                }
-        return available
+                stock[normalized] = stock.get(normalized, 0) + amount
+        return {name: stock[name] for name in INGREDIENTS if name in stock}
+    
+    def get_available_ingredients(self) -> Dict[str, dict]:
+        """Get available ingredients from inventory"""
+        return {
+            name: {**INGREDIENTS[name], "available": amount}
+            for name, amount in self.normalized_inventory().items()
+        }
     
     def calculate_nutrition(self, mix: Dict[str, float]) -> Dict[str, float]:
         """Calculate nutritional values for a mix"""
@@ -167,166 +378,620 @@ class PigeonMixCalculator:
         nutrition = self.calculate_nutrition(mix)
         categories = self.calculate_category_ratios(mix)
         
-        # Protein score
-        target_protein = sum(self.profile["protein"]) / 2
-        protein_score = max(0, 1 - abs(nutrition["protein"] - target_protein) / target_protein)
-        
-        # Carbs score
-        target_carbs = sum(self.profile["carbs"]) / 2
-        carbs_score = max(0, 1 - abs(nutrition["carbs"] - target_carbs) / target_carbs)
-        
-        # Fat score
-        target_fat = sum(self.profile["fat"]) / 2
-        fat_score = max(0, 1 - abs(nutrition["fat"] - target_fat) / target_fat)
-        
-        # Fiber score (lower is better, penalize if over 5%)
-        fiber_score = 1.0 if nutrition["fiber"] < 5 else max(0, 1 - (nutrition["fiber"] - 5) / 5)
-        
-        # Category ratio score
-        category_score = 0
-        for cat, (min_ratio, max_ratio) in self.profile["category_ratios"].items():
-            target_ratio = (min_ratio + max_ratio) / 2
-            actual_ratio = categories.get(cat, 0)
-            category_score += max(0, 1 - abs(actual_ratio - target_ratio) / target_ratio)
-        category_score /= 3  # Average across 3 categories
-        
-        # Diversity bonus
-        diversity_score = min(1.0, len(mix) / 5)  # Reward up to 5 ingredients
-        
-        # Total score
-        total_score = (
-            protein_score * 0.30 +
-            carbs_score * 0.25 +
-            fat_score * 0.15 +
-            fiber_score * 0.10 +
-            category_score * 0.15 +
-            diversity_score * 0.05
-        )
-        
-        return total_score
-    
-    def generate_mix_candidates(self, available: Dict[str, dict], target_weight: float = 1000) -> List[Dict[str, float]]:
+        # Macro tents, fiber ceiling, category tents and diversity bonus,
+        # against targets precomputed in the compiled profile
+        return self.compiled_profile.score(nutrition, categories, len(mix))
+    
+    def resolve_seed(self, seed: Optional[int] = None) -> int:
+        """Seed for one sampling run: the given seed, the calculator's seed, or a draw from its rng"""
+        if seed is not None:
+            return seed
+        if self.seed is not None:
+            return self.seed
+        return self.rng.randrange(2 ** 63)
+    
+    def score_mixes(self, mixes: List[Dict[str, float]]) -> List[float]:
+        """Score many mixes at once, vectorized with NumPy when it is installed"""
+        if not HAVE_NUMPY:
+            return [self.score_mix(mix) for mix in mixes]
+        
+        return self.get_batch_scorer().score_mixes(mixes)
+    
+    def score_packed(self, mixes: List[PackedMix]) -> List[float]:
+        """Score packed (ids, amounts) mixes; same values as score_mixes"""
+        if HAVE_NUMPY:
+            return self.get_batch_scorer().score_packed(mixes)
+        
+        profile = self.compiled_profile
+        return [profile.score(CATALOG.nutrition(ids, amounts), CATALOG.category_ratios(ids, amounts), len(ids))
+                for ids, amounts in mixes]
+    
+    def get_batch_scorer(self) -> "BatchScorer":
+        """NumPy scorer for this calculator's profile, built on first use"""
+        scorer = BATCH_SCORERS.get(self.compiled_profile.key)
+        if scorer is None:
+            from batch_scoring import BatchScorer
+            scorer = BATCH_SCORERS.setdefault(self.compiled_profile.key, BatchScorer(CATALOG, self.compiled_profile))
+        return scorer
+    
+    def score_terms(self, names: List[str]) -> List[ScoreTerm]:
+        """Express score_mix (without the diversity bonus) as solver terms over `names`"""
+        profile = self.compiled_profile
+        terms = []
+        for nutrient, target, _, weight in profile.macros:
+            coefficients = [INGREDIENTS[name][nutrient] for name in names]
+            terms.append(tent_term(weight, coefficients, target))
+        
+        fiber = [INGREDIENTS[name]["fiber"] for name in names]
+        terms.append(ceiling_term(profile.fiber_weight, fiber, profile.fiber_limit))
+        
+        for cat, target, _, weight in profile.categories:
+            shares = [100.0 if INGREDIENTS[name]["category"] == cat else 0.0 for name in names]
+            terms.append(tent_term(weight, shares, target))
+        
+        return terms
+    
+    def solve_mix_lp(self, available: Dict[str, dict], target_weight: float = 1000,
+                     notices: Optional[List[Warning]] = None) -> Dict[str, float]:
+        """
+        Solve for the best proportions exactly with linear programming
+        
+        The whole of score_mix is optimized globally under the stock caps,
+        with branch-and-bound over the diversity bonus. The model counts an
+        ingredient towards diversity from MEANINGFUL_AMOUNT grams upwards,
+        while score_mix counts any non-zero amount, so the result scores at
+        least as well under score_mix as every mix whose ingredients are all
+        MEANINGFUL_AMOUNT grams or more. When the search runs out of
+        LP_NODE_LIMIT nodes before proving the best mix, the best one found
+        is returned with a SolverLimitWarning; with a notices list, that and
+        any ShortStockWarning are appended to it instead of warned.
+        """
+        names = list(available.keys())
+        caps = [available[name]["available"] for name in names]
+        total = achievable_weight(caps, target_weight, notices)
+        diversity = Diversity(SCORE_WEIGHTS["diversity"], DIVERSITY_COUNT, MEANINGFUL_AMOUNT)
+        
+        solution = solve_continuous(self.score_terms(names), caps, total, diversity, max_nodes=LP_NODE_LIMIT)
+        if solution is None:
+            return {}
+        if not solution.optimal:
+            notify(notices, SolverLimitWarning(
+                f"LP search stopped after {solution.nodes} nodes without proving the mix optimal; "
+                f"returning the best mix found (score {solution.score:.4f})"))
+        return {name: amount for name, amount in zip(names, solution.amounts) if amount > 1e-6}
+    
+    def solve_mix_milp(self, available: Dict[str, dict], target_weight: float = 1000,
+                       stop: Optional[Event] = None, notices: Optional[List[Warning]] = None) -> Dict[str, float]:
+        """
+        Solve the integer-gram model exactly with branch-and-bound
+        
+        Stock is truncated to whole increments (Aᵢ) and the batch is the
+        achievable weight W = min(target_weight, ΣAᵢ). An ingredient earns
+        diversity credit only from MEANINGFUL_AMOUNT grams upwards. When the
+        search runs out of MILP_NODE_LIMIT nodes before proving the best mix,
+        the best one found is returned with a SolverLimitWarning. Setting
+        stop (a threading.Event) ends the search early, without a warning.
+        With a notices list, warnings are appended to it instead.
+        """
+        names = list(available.keys())
+        solution = None
+        for solution in self.iter_milp_solutions(available, target_weight, stop=stop, notices=notices):
+            pass
+        if solution is None:
+            return {}
+        if not solution.optimal and not (stop is not None and stop.is_set()):
+            notify(notices, SolverLimitWarning(
+                f"MILP search stopped after {solution.nodes} nodes without proving the mix optimal; "
+                f"returning the best mix found (score {solution.score:.4f})"))
+        return {name: float(amount) for name, amount in zip(names, solution.amounts) if amount > 0}
+    
+    def iter_milp_mixes(self, available: Dict[str, dict], target_weight: float = 1000,
+                        stop_at: Optional[float] = None, stop: Optional[Event] = None,
+                        notices: Optional[List[Warning]] = None) -> Iterator[Dict[str, float]]:
+        """
+        Yield each improving integer-gram mix found by solve_mix_milp's search
+        
+        The search stops early at stop_at (a time.monotonic() value) or once
+        stop is set; the root relaxation is always solved first.
+        """
+        names = list(available.keys())
+        for solution in self.iter_milp_solutions(available, target_weight, stop_at, stop, notices):
+            yield {name: float(amount) for name, amount in zip(names, solution.amounts) if amount > 0}
+    
+    def iter_milp_solutions(self, available: Dict[str, dict], target_weight: float = 1000,
+                            stop_at: Optional[float] = None, stop: Optional[Event] = None,
+                            notices: Optional[List[Warning]] = None) -> Iterator[MixSolution]:
+        """
+        iter_milp_mixes as solver solutions, amounts in available's order
+        
+        The last solution yielded is optimal=True only when the search
+        proved it best within MILP_NODE_LIMIT nodes, before stop_at and
+        without being stopped.
+        """
+        if target_weight < 0 or target_weight % INCREMENT:
+            raise ValueError(f"Target weight must be a non-negative multiple of {INCREMENT}g")
+        
+        names = list(available.keys())
+        caps = [(available[name]["available"] // INCREMENT) * INCREMENT for name in names]
+        total = achievable_weight(caps, target_weight, notices)
+        diversity = Diversity(SCORE_WEIGHTS["diversity"], DIVERSITY_COUNT, MEANINGFUL_AMOUNT)
+        
+        yield from iter_integer_solutions(self.score_terms(names), caps, total, INCREMENT, diversity,
+                                          max_nodes=MILP_NODE_LIMIT, deadline=stop_at, stop=stop)
+    
+    def generate_mix_candidates(self, available: Dict[str, dict], target_weight: float = 1000,
+                                seed: Optional[int] = None) -> List[Dict[str, float]]:
         """Generate candidate mixes to evaluate"""
-        candidates = []
-        ingredient_names = list(available.keys())
-        
-        # Try different combinations
-        for n_ingredients in range(min(3, len(ingredient_names)), min(8, len(ingredient_names)) + 1):
-            for combo in itertools.combinations(ingredient_names, n_ingredients):
-                # Generate several ratio variations for this combination
-                for _ in range(10):
-                    mix = {}
-                    remaining = target_weight
-                    
-                    for i, ing in enumerate(combo):
-                        if i == len(combo) - 1:
-                            # Last ingredient gets remainder
-                            amount = min(remaining, available[ing]["available"])
-                        else:
-                            # Random proportion
-                            import random
-                            max_amount = min(remaining * 0.7, available[ing]["available"])
-                            amount = random.uniform(remaining * 0.05, max_amount)
-                        
-                        mix[ing] = amount
-                        remaining -= amount
-                    
-                    # Normalize to target weight
-                    actual_total = sum(mix.values())
-                    if actual_total > 0:
-                        scale = min(target_weight / actual_total, 1.0)
-                        mix = {k: v * scale for k, v in mix.items()}
-                        
-                        # Check if we have enough of each ingredient
-                        if all(mix[ing] <= available[ing]["available"] for ing in mix):
-                            candidates.append(mix)
-        
-        return candidates
-    
-    def optimize_mix(self, target_weight: float = 1000) -> Dict[str, float]:
-        """Find the best mix from available ingredients"""
+        return list(self.iter_mix_candidates(available, target_weight, seed))
+    
+    def iter_mix_candidates(self, available: Dict[str, dict], target_weight: float = 1000,
+                            seed: Optional[int] = None) -> Iterator[Dict[str, float]]:
+        """Yield candidate mixes one at a time, without holding them in memory"""
+        for _, mix in self.iter_ranked_candidates(available, target_weight, seed):
+            yield mix
+    
+    def iter_ranked_candidates(self, available: Dict[str, dict], target_weight: float = 1000,
+                               seed: Optional[int] = None, start: int = 0,
+                               stop: Optional[int] = None) -> Iterator[Tuple[int, Dict[str, float]]]:
+        """
+        Yield (position, mix) for the combination ranks in [start, stop)
+        
+        Positions follow the serial candidate order. Every combination draws
+        from its own child stream of the run seed (see shard_search), so
+        any rank range reproduces exactly the candidates of the serial search.
+        """
+        for position, ids, amounts in self.iter_packed_candidates(available, target_weight, seed, start, stop):
+            yield position, CATALOG.unpack(ids, amounts)
+    
+    def iter_packed_candidates(self, available: Dict[str, dict], target_weight: float = 1000,
+                               seed: Optional[int] = None, start: int = 0,
+                               stop: Optional[int] = None) -> Iterator[Tuple[int, Tuple[int, ...], array]]:
+        """
+        Yield (position, ids, amounts) for the combination ranks in [start, stop)
+        
+        The packed form of iter_ranked_candidates: catalog IDs and an
+        array('d') of grams instead of a dict per candidate.
+        """
+        ingredient_ids = tuple(CATALOG.ids[name] for name in available)
+        stock = array("d", (data["available"] for data in available.values()))
+        return self.iter_stock_candidates(ingredient_ids, stock, target_weight, seed, start, stop)
+    
+    def iter_stock_candidates(self, ingredient_ids: Sequence[int], stock: Sequence[float],
+                              target_weight: float = 1000, seed: Optional[int] = None, start: int = 0,
+                              stop: Optional[int] = None) -> Iterator[Tuple[int, Tuple[int, ...], array]]:
+        """iter_packed_candidates for stock given as catalog IDs and the grams available of each"""
+        return shard_search.iter_stock_candidates(ingredient_ids, stock, target_weight, self.resolve_seed(seed),
+                                                  CANDIDATE_VARIATIONS, start, stop)
+    
+    def select_top_packed(self, candidates: Iterable[Tuple[int, Tuple[int, ...], array]],
+                          k: int = 1) -> List[Tuple[float, int, Dict[str, float]]]:
+        """
+        Keep the best k of packed (position, ids, amounts) candidates
+        
+        Candidates are scored in batches of BATCH_SIZE, so memory is bounded
+        by k + BATCH_SIZE however many are scored; ties go to the lowest
+        position. Only the k survivors are unpacked into dict mixes.
+        
+        Returns:
+            [(score, position, mix)] sorted best first
+        """
+        return [(score, position, CATALOG.unpack(*packed))
+                for score, position, packed in self.keep_top_packed(candidates, k)]
+    
+    def keep_top_packed(self, candidates: Iterable[Tuple[int, Tuple[int, ...], array]],
+                        k: int = 1) -> List[Tuple[float, int, PackedMix]]:
+        """select_top_packed without the unpacking: [(score, position, (ids, amounts))] best first"""
+        return shard_search.keep_top_packed(candidates, self.score_packed, k, BATCH_SIZE)
+    
+    def search_sharded(self, available: Dict[str, dict], target_weight: float, k: int,
+                       workers: int, seed: int) -> List[Tuple[float, Dict[str, float]]]:
+        """
+        Sample candidates across worker processes, sharded by combination rank
+        
+        Each worker unranks the start of its shard, scores only that range and
+        returns its best k. The merged result equals the serial search with
+        the same seed. Workers of the reused search_pool() read the catalog
+        from the shared_catalog() segment, and tasks and results carry only
+        catalog IDs and grams; just the final k mixes are unpacked into dicts.
+        """
+        from concurrent.futures.process import BrokenProcessPool
+        
+        ingredient_ids = tuple(CATALOG.ids[name] for name in available)
+        stock = array("d", (data["available"] for data in available.values()))
+        sizes = range(min(3, len(stock)), min(8, len(stock)) + 1)
+        total = combination_count(len(stock), sizes)
+        
+        pool = search_pool(workers)
+        try:
+            futures = [
+                pool.submit(shard_search.search_shard, self.compiled_profile, ingredient_ids, stock, target_weight,
+                            seed, CANDIDATE_VARIATIONS, start, stop, k, BATCH_SIZE)
+                for start, stop in shard_ranges(total, workers * SHARDS_PER_WORKER)
+            ]
+            entries = [entry for future in futures for entry in future.result()]
+        except BrokenProcessPool:
+            # A worker died; the next search starts a fresh pool
+            shutdown_search_pool(pool)
+            raise
+        
+        entries.sort(key=lambda e: (e[0], -e[1]), reverse=True)
+        return [(score, CATALOG.unpack(*packed)) for score, _, packed in entries[:k]]
+    
+    def sample_top_mixes(self, available: Dict[str, dict], target_weight: float, k: int,
+                         workers: int = 1, seed: Optional[int] = None,
+                         stop: Optional[Event] = None) -> List[Tuple[float, Dict[str, float]]]:
+        """Best k sampled candidates, serially (stopping once stop is set) or across worker processes"""
+        seed = self.resolve_seed(seed)
+        if workers > 1:
+            return self.search_sharded(available, target_weight, k, workers, seed)
+        candidates = self.iter_packed_candidates(available, target_weight, seed)
+        if stop is not None:
+            candidates = itertools.takewhile(lambda _: not stop.is_set(), candidates)
+        return [(score, mix) for score, _, mix in self.select_top_packed(candidates, k)]
+    
+    def iter_sampled_mixes(self, available: Dict[str, dict], target_weight: float = 1000,
+                           seed: Optional[int] = None, stop_at: Optional[float] = None,
+                           k: int = 1, stop: Optional[Event] = None) -> Iterator[Dict[str, float]]:
+        """
+        Yield each strictly better sampled candidate, in serial candidate order
+        
+        Candidates are scored in batches of ANYTIME_BATCH_SIZE and the clock is
+        checked after every batch, so the search stops within one batch of
+        stop_at (a time.monotonic() value) or of stop being set (a
+        threading.Event). Run to completion, the last mix is
+        the one sample_top_mixes ranks first.
+        
+        Returns:
+            The best k candidates seen, as [(score, mix)] sorted best first
+            (the generator's return value, for `yield from`)
+        """
+        heap = []
+        best = float("-inf")
+        candidates = self.iter_packed_candidates(available, target_weight, seed)
+        while True:
+            batch = list(itertools.islice(candidates, ANYTIME_BATCH_SIZE))
+            if not batch:
+                break
+            scores = self.score_packed([(ids, amounts) for _, ids, amounts in batch])
+            for score, (position, ids, amounts) in zip(scores, batch):
+                keep_top(heap, (score, -position, (ids, amounts)), k)
+            index = max(range(len(batch)), key=scores.__getitem__)
+            if scores[index] > best:
+                best = scores[index]
+                yield CATALOG.unpack(*batch[index][1:])
+            if (stop_at is not None and time.monotonic() >= stop_at) or (stop is not None and stop.is_set()):
+                break
+        
+        return [(score, CATALOG.unpack(*packed)) for score, _, packed in sorted_top(heap)]
+    
+    def iter_refined_mixes(self, available: Dict[str, dict], ranked: List[Tuple[float, Dict[str, float]]],
+                           stop_at: Optional[float] = None,
+                           stop: Optional[Event] = None) -> Iterator[Tuple[float, Dict[str, float]]]:
+        """
+        Hill-climb from each ranked mix and yield every strictly better (score, mix)
+        
+        Moves are gram shifts, adds, drops and swaps within stock (see
+        mix_refinement). Starting points are refined in rank order; ties keep
+        the earlier result.
+        """
+        if not ranked:
+            return
+        caps = {name: data["available"] for name, data in available.items()}
+        step = REFINE_STEP * sum(ranked[0][1].values())
+        best = ranked[0][0]
+        for _, start in ranked:
+            for score, mix in iter_refinements(start, caps, self.score_mixes, step, REFINE_MIN_STEP,
+                                               stop_at, stop):
+                if score > best:
+                    best = score
+                    yield score, mix
+    
+    def iter_sample_engine(self, available: Dict[str, dict], target_weight: float = 1000,
+                           seed: Optional[int] = None, stop_at: Optional[float] = None,
+                           refine: bool = True, stop: Optional[Event] = None) -> Iterator[Dict[str, float]]:
+        """
+        Anytime sampling engine: the 'lp' solution, improving samples, then refinements
+        
+        Candidates come in combination rank order, so early samples only
+        use the first catalog ingredients; with refine, the 'lp' solution
+        is yielded before them, so the first mix is already close to the
+        best one.
+        """
+        starts = self.lp_starts(available, target_weight) if refine else []
+        for _, mix in starts:
+            yield mix
+        ranked = yield from self.iter_sampled_mixes(available, target_weight, seed, stop_at,
+                                                    REFINE_TOP if refine else 1, stop)
+        if refine:
+            for _, mix in self.iter_refined_mixes(available, merge_ranked(ranked, starts), stop_at, stop):
+                yield mix
+    
+    def lp_starts(self, available: Dict[str, dict], target_weight: float) -> List[Tuple[float, Dict[str, float]]]:
+        """
+        The 'lp' solution as a [(score, mix)] starting point for refinement, or [] without one
+        
+        Its solver notices are dropped: the sampling engine's result does
+        not depend on them.
+        """
+        mix = self.solve_mix_lp(available, target_weight, notices=[])
+        return [(self.score_mix(mix), mix)] if mix else []
+    
+    def fallback_mix(self, available: Dict[str, dict], target_weight: float = 1000) -> Dict[str, float]:
+        """Use all available ingredients proportionally"""
+        total_available = sum(ing["available"] for ing in available.values())
+        scale = min(target_weight / total_available, 1.0)
+        return {name: data["available"] * scale for name, data in available.items()}
+    
+    def pool_ingredients(self, available: Dict[str, dict], increment: float = None) -> Tuple[Dict[str, dict], Dict[str, List[str]]]:
+        """
+        Collapse nutritionally identical ingredients into pooled search ingredients
+        
+        Returns:
+            (pooled_available, groups); split results back with split_pooled_mix
+        """
+        groups = group_equivalents(available)
+        return pool_available(available, groups, increment), groups
+    
+    def rank_mixes(self, target_weight: float = 1000, k: int = 5, pool_equivalents: bool = True,
+                   workers: int = 1, seed: Optional[int] = None) -> List[Tuple[float, Dict[str, float]]]:
+        """
+        Best k sampled mixes with their scores, best first
+        
+        Args:
+            target_weight: Desired batch size in grams
+            k: Number of alternatives to keep
+            pool_equivalents: Search identical ingredients as one pooled ingredient
+            workers: Worker processes for the candidate search
+            seed: Seed for reproducible sampling
+        """
+        available = self.get_available_ingredients()
+        
+        if not available:
+            return []
+        
+        search = available
+        if pool_equivalents:
+            search, groups = self.pool_ingredients(available)
+        
+        ranked = self.sample_top_mixes(search, target_weight, k, workers, seed)
+        if not ranked:
+            mix = self.fallback_mix(search, target_weight)
+            ranked = [(self.score_mix(mix), mix)]
+        
+        if pool_equivalents:
+            mixes = [split_pooled_mix(mix, groups, available) for _, mix in ranked]
+            ranked = sorted(zip(self.score_mixes(mixes), mixes), key=lambda e: e[0], reverse=True)
+        return ranked
+    
+    def optimize_mix(self, target_weight: float = 1000, engine: str = "sample",
+                     pool_equivalents: bool = True, workers: int = 1,
+                     seed: Optional[int] = None, deadline: Optional[float] = None,
+                     refine: bool = True, use_cache: bool = True,
+                     stop: Optional[Event] = None, notices: Optional[List[Warning]] = None) -> Dict[str, float]:
+        """
+        Find the best mix from available ingredients
+        
+        'lp' solutions are kept in PROPORTION_CACHE and reused, scaled, by
+        later requests for the same or a smaller batch where that gives
+        the optimum (see scaled_solution).
+        
+        Args:
+            target_weight: Desired batch size in grams
+            engine: 'sample' scores random candidates, 'lp' solves the
+                continuous model exactly, 'milp' solves the integer-gram model
+            pool_equivalents: Search nutritionally identical ingredients as one
+                pooled ingredient, then split its amount across the real items
+                (POOLED_ENGINES only)
+            workers: Worker processes for the 'sample' engine
+            seed: Seed for this run, overriding the calculator's seed
+            deadline: Time budget in seconds; the best mix found when it
+                expires is returned. Deadline searches run in this process
+            refine: Improve the best sampled mixes and the 'lp' solution
+                by local search ('sample' engine)
+            use_cache: Reuse and store 'lp' solutions in PROPORTION_CACHE
+            stop: threading.Event that ends the search early when set;
+                the best mix so far is returned and not cached. Process
+                pool searches (workers > 1) are not stopped
+            notices: List to append the solver's ShortStockWarning and
+                SolverLimitWarning to; by default they are warned
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of {ENGINES}")
+        
         available = self.get_available_ingredients()
         
         if not available:
             return {}
         
-        # Generate candidates
-        candidates = self.generate_mix_candidates(available, target_weight)
+        if deadline is not None:
+            mix = None
+            for _, mix in self.iter_improving_mixes(target_weight, engine, pool_equivalents, seed,
+                                                     deadline, refine, stop, notices):
+                pass
+            return mix if mix is not None else self.fallback_mix(available, target_weight)
         
-        if not candidates:
-            # Fallback: use all available ingredients proportionally
-            total_available = sum(ing["available"] for ing in available.values())
-            scale = min(target_weight / total_available, 1.0)
-            return {name: data["available"] * scale for name, data in available.items()}
+        key = self.proportion_key() if use_cache and engine in CACHED_ENGINES else None
+        if key is not None:
+            caps = {name: data["available"] for name, data in available.items()}
+            cached = PROPORTION_CACHE.get(key, lambda entry: scaled_solution(entry, caps, target_weight) is not None)
+            if cached is not None:
+                return scaled_solution(cached, caps, target_weight)
         
-        # Score and select best
-        best_mix = max(candidates, key=self.score_mix)
-        return best_mix
+        found = []
+        if not pool_equivalents or engine not in POOLED_ENGINES:
+            mix = self.search_mix(available, target_weight, engine, workers, seed, refine, stop, found)
+        else:
+            increment = INCREMENT if engine == "milp" else None
+            search, groups = self.pool_ingredients(available, increment)
+            mix = self.search_mix(search, target_weight, engine, workers, seed, refine, stop, found)
+            mix = split_pooled_mix(mix, groups, available, increment)
+        for notice in found:
+            notify(notices, notice)
+        
+        # Solutions that came with a notice are not reused without it
+        if key is not None and mix and not found and not (stop is not None and stop.is_set()):
+            PROPORTION_CACHE.put(key, (target_weight, dict(mix)))
+        return mix
     
-    def check_warnings(self, mix: Dict[str, float]):
-        """Generate warnings based on mix composition"""
-        self.warnings = []
+    def proportion_key(self) -> Tuple:
+        """PROPORTION_CACHE key of the 'lp' solutions for this inventory and profile, any batch size"""
+        return tuple(self.normalized_inventory().items()), self.compiled_profile.key
+    
+    def iter_improving_mixes(self, target_weight: float = 1000, engine: str = "sample",
+                             pool_equivalents: bool = True, seed: Optional[int] = None,
+                             deadline: Optional[float] = None, refine: bool = True,
+                             stop: Optional[Event] = None,
+                             notices: Optional[List[Warning]] = None) -> Iterator[Tuple[float, Dict[str, float]]]:
+        """
+        Progressive optimize_mix: yield (score, mix) for each strictly better mix
+        
+        The first mix arrives after one batch of candidates (or one solver
+        node), so callers can show it at once and replace it as better ones
+        come in. Stops when the search completes, the deadline (seconds)
+        expires or stop (a threading.Event) is set; the last mix yielded is
+        what optimize_mix returns. Solver notices go to notices, as for
+        optimize_mix; a search ended by the deadline or stop is not one.
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of {ENGINES}")
+        
+        stop_at = None if deadline is None else time.monotonic() + deadline
         available = self.get_available_ingredients()
-        nutrition = self.calculate_nutrition(mix)
-        categories = self.calculate_category_ratios(mix)
+        
+        if not available:
+            return
+        
+        search, groups = available, None
+        increment = INCREMENT if engine == "milp" else None
+        if pool_equivalents and engine in POOLED_ENGINES:
+            search, groups = self.pool_ingredients(available, increment)
+        
+        if engine == "lp":
+            mixes = iter([self.solve_mix_lp(search, target_weight, notices)])
+        elif engine == "milp":
+            mixes = self.iter_milp_mixes(search, target_weight, stop_at, stop, notices)
+        else:
+            mixes = self.iter_sample_engine(search, target_weight, seed, stop_at, refine, stop)
+        
+        best = float("-inf")
+        for mix in mixes:
+            if groups is not None:
+                mix = split_pooled_mix(mix, groups, available, increment)
+            score = self.score_mix(mix)
+            if mix and score > best:
+                best = score
+                yield score, mix
+    
+    def search_mix(self, available: Dict[str, dict], target_weight: float, engine: str,
+                   workers: int = 1, seed: Optional[int] = None, refine: bool = True,
+                   stop: Optional[Event] = None, notices: Optional[List[Warning]] = None) -> Dict[str, float]:
+        """Run one optimization engine over the given available ingredients, until stop is set"""
+        if engine == "lp":
+            return self.solve_mix_lp(available, target_weight, notices)
+        if engine == "milp":
+            return self.solve_mix_milp(available, target_weight, stop, notices)
+        
+        # Score candidates as they are generated and keep the best
+        ranked = self.sample_top_mixes(available, target_weight, REFINE_TOP if refine else 1, workers, seed, stop)
+        if refine:
+            ranked = merge_ranked(ranked, self.lp_starts(available, target_weight))
+        
+        if not ranked:
+            return self.fallback_mix(available, target_weight)
+        
+        mix = ranked[0][1]
+        if refine:
+            for _, mix in self.iter_refined_mixes(available, ranked, stop=stop):
+                pass
+        return mix
+    
+    def analyze(self, mix: Union[Dict[str, float], Mix, MixAnalysis]) -> MixAnalysis:
+        """Analysis of a mix against this calculator's profile; analyses pass through"""
+        if isinstance(mix, MixAnalysis) and mix.profile is self.compiled_profile:
+            return mix
+        if isinstance(mix, MixAnalysis):
+            mix = mix.mix
+        return MixAnalysis(mix if isinstance(mix, Mix) else Mix(mix), CATALOG, self.compiled_profile)
+    
+    def mix_warnings(self, mix: Union[Dict[str, float], Mix, MixAnalysis],
+                     notices: Sequence[Warning] = ()) -> List[Tuple[str, str]]:
+        """
+        (level, message) warnings based on mix composition; leaves the calculator untouched
+        
+        notices are the solver's warnings about how the mix was found (see
+        optimize_mix), reported after the composition warnings.
+        """
+        warnings = []
+        available = self.get_available_ingredients()
+        analysis = self.analyze(mix)
+        mix, nutrition, categories = analysis.mix, analysis.nutrition, analysis.categories
         
         # Critical warnings
         if categories.get("legume", 0) < 5:
-            self.warnings.append(("CRITICAL", "No legumes in mix - essential for protein and vitamins!"))
+            warnings.append(("CRITICAL", "No legumes in mix - essential for protein and vitamins!"))
         
         if categories.get("grain", 0) < 30:
-            self.warnings.append(("CRITICAL", "Insufficient grains - essential for energy!"))
+            warnings.append(("CRITICAL", "Insufficient grains - essential for energy!"))
         
         if nutrition["protein"] < 10:
-            self.warnings.append(("CRITICAL", f"Protein too low ({nutrition['protein']:.1f}%) - minimum 10% needed"))
+            warnings.append(("CRITICAL", f"Protein too low ({nutrition['protein']:.1f}%) - minimum 10% needed"))
         
         if nutrition["protein"] > 20:
-            self.warnings.append(("CRITICAL", f"Protein too high ({nutrition['protein']:.1f}%) - can stress kidneys"))
+            warnings.append(("CRITICAL", f"Protein too high ({nutrition['protein']:.1f}%) - can stress kidneys"))
         
         if nutrition["fiber"] > 7:
-            self.warnings.append(("CRITICAL", f"Fiber too high ({nutrition['fiber']:.1f}%) - pigeons don't utilize fiber well"))
+            warnings.append(("CRITICAL", f"Fiber too high ({nutrition['fiber']:.1f}%) - pigeons don't utilize fiber well"))
         
         if len(mix) <= 2:
-            self.warnings.append(("CRITICAL", "Very limited diversity - need at least 3-4 ingredients"))
+            warnings.append(("CRITICAL", "Very limited diversity - need at least 3-4 ingredients"))
         
         # Advisory warnings
         if "corn_yellow" not in mix and "corn_yellow" not in available and "maize" not in mix:
-            self.warnings.append(("WARNING", "No yellow corn - risk of Vitamin A deficiency"))
+            warnings.append(("WARNING", "No yellow corn - risk of Vitamin A deficiency"))
         
         if categories.get("seed", 0) < 3 and nutrition["fat"] < 3:
-            self.warnings.append(("WARNING", "No oil seeds - fat content may be low"))
+            warnings.append(("WARNING", "No oil seeds - fat content may be low"))
         
         if len(mix) < 4:
-            self.warnings.append(("WARNING", "Limited diversity - consider adding more ingredients"))
+            warnings.append(("WARNING", "Limited diversity - consider adding more ingredients"))
         
         # Check against target profile
         target_protein = sum(self.profile["protein"]) / 2
         if abs(nutrition["protein"] - target_protein) / target_protein > 0.15:
-            self.warnings.append(("WARNING", f"Protein ({nutrition['protein']:.1f}%) differs from target ({target_protein:.1f}%) by >15%"))
+            warnings.append(("WARNING", f"Protein ({nutrition['protein']:.1f}%) differs from target ({target_protein:.1f}%) by >15%"))
+        
+        warnings.extend(("WARNING", str(notice)) for notice in notices)
+        warnings.extend(self.name_warnings())
+        
+        return warnings
     
-    def generate_suggestions(self, mix: Dict[str, float]):
-        """Generate suggestions for improving the mix"""
-        self.suggestions = []
+    def check_warnings(self, mix: Union[Dict[str, float], Mix, MixAnalysis]):
+        """Generate warnings based on mix composition"""
+        self.warnings = self.mix_warnings(mix)
+    
+    def mix_suggestions(self, mix: Union[Dict[str, float], Mix, MixAnalysis]) -> List[str]:
+        """Suggestions for improving the mix; leaves the calculator untouched"""
+        suggestions = []
         available = self.get_available_ingredients()
-        nutrition = self.calculate_nutrition(mix)
-        categories = self.calculate_category_ratios(mix)
+        analysis = self.analyze(mix)
+        mix, nutrition, categories = analysis.mix, analysis.nutrition, analysis.categories
         
         # Suggest adding missing categories
         if categories.get("legume", 0) < 15:
             legumes_available = [name for name, data in available.items() 
                                if data["category"] == "legume" and name not in mix]
             if legumes_available:
-                self.suggestions.append(f"Add {legumes_available[0].replace('_', ' ')} to increase protein and legume content")
+                suggestions.append(f"Add {legumes_available[0].replace('_', ' ')} to increase protein and legume content")
         
         if categories.get("seed", 0) < 5 and self.situation in ["breeding", "molting", "winter"]:
             seeds_available = [name for name, data in available.items() 
                              if data["category"] == "seed" and name not in mix]
             if seeds_available:
-                self.suggestions.append(f"Add {seeds_available[0].replace('_', ' ')} to increase fat content (important for {self.situation})")
+                suggestions.append(f"Add {seeds_available[0].replace('_', ' ')} to increase fat content (important for {self.situation})")
         
         # Suggest yellow corn if missing
         if "corn_yellow" not in mix and "corn_yellow" in available:
-            self.suggestions.append("Add yellow corn for Vitamin A (essential nutrient)")
+            suggestions.append("Add yellow corn for Vitamin A (essential nutrient)")
         
         # Suggest reducing high-fiber ingredients
         if nutrition["fiber"] > 5:
@@ -334,35 +999,42 @@ class PigeonMixCalculator:
                          if INGREDIENTS[ing]["fiber"] > 7]
             if high_fiber:
                 worst = max(high_fiber, key=lambda x: x[1])
-                self.suggestions.append(f"Reduce {worst[0].replace('_', ' ')} to lower fiber content")
+                suggestions.append(f"Reduce {worst[0].replace('_', ' ')} to lower fiber content")
         
         # Situation-specific suggestions
         if self.situation == "racing" and categories.get("legume", 0) < 35:
-            self.suggestions.append("For racing, increase peas/legumes to 40-50% for better performance")
+            suggestions.append("For racing, increase peas/legumes to 40-50% for better performance")
         
         if self.situation == "winter" and nutrition["fat"] < 5:
-            self.suggestions.append("For winter, add more oil seeds (hemp, sunflower) for warmth")
+            suggestions.append("For winter, add more oil seeds (hemp, sunflower) for warmth")
         
         if self.situation == "molting" and nutrition["protein"] < 16:
-            self.suggestions.append("For molting, increase protein to 16%+ with more legumes")
+            suggestions.append("For molting, increase protein to 16%+ with more legumes")
+        
+        return suggestions
     
-    def generate_herb_recommendations(self, batch_weight: float):
-        """Generate herb and supplement recommendations based on situation"""
-        self.herb_recommendations = []
+    def generate_suggestions(self, mix: Union[Dict[str, float], Mix, MixAnalysis]):
+        """Generate suggestions for improving the mix"""
+        self.suggestions = self.mix_suggestions(mix)
+    
+    def herb_lines(self, batch_weight: float) -> List[str]:
+        """Herb and supplement recommendation lines for the situation; leaves the calculator untouched"""
+        lines = []
+        herbs, recommendations = herb_data()
         
-        if self.situation not in HERB_RECOMMENDATIONS:
-            return
+        if self.situation not in recommendations:
+            return lines
         
-        recommended_herbs = HERB_RECOMMENDATIONS[self.situation]["recommended"]
-        situation_notes = HERB_RECOMMENDATIONS[self.situation]["notes"]
+        recommended_herbs = recommendations[self.situation]["recommended"]
+        situation_notes = recommendations[self.situation]["notes"]
         
-        self.herb_recommendations.append(f"Recommended herbs/supplements for {self.profile['name']}:")
-        self.herb_recommendations.append(f"Purpose: {situation_notes}")
-        self.herb_recommendations.append("")
+        lines.append(f"Recommended herbs/supplements for {self.profile['name']}:")
+        lines.append(f"Purpose: {situation_notes}")
+        lines.append("")
         
         for herb_name in recommended_herbs:
-            if herb_name in HERBS_SUPPLEMENTS:
-                herb = HERBS_SUPPLEMENTS[herb_name]
+            if herb_name in herbs:
+                herb = herbs[herb_name]
                 display_name = herb_name.replace("_", " ").title()
                 benefits = ", ".join(herb["benefits"])
                 dosage = herb["dosage_per_kg"]
@@ -372,18 +1044,36 @@ class PigeonMixCalculator:
                 # Calculate amount for this batch
                 batch_kg = batch_weight / 1000
                 
-                self.herb_recommendations.append(f"• {display_name}")
-                self.herb_recommendations.append(f"  Benefits: {benefits}")
-                self.herb_recommendations.append(f"  Dosage: {dosage} of mix")
-                self.herb_recommendations.append(f"  Frequency: {frequency}")
-                self.herb_recommendations.append(f"  Notes: {notes}")
-                self.herb_recommendations.append("")
-    
-    def format_recipe_card(self, mix: Dict[str, float]) -> str:
-        """Generate a printable recipe card"""
-        nutrition = self.calculate_nutrition(mix)
-        categories = self.calculate_category_ratios(mix)
-        total_weight = sum(mix.values())
+                lines.append(f"• {display_name}")
+                lines.append(f"  Benefits: {benefits}")
+                lines.append(f"  Dosage: {dosage} of mix")
+                lines.append(f"  Frequency: {frequency}")
+                lines.append(f"  Notes: {notes}")
+                lines.append("")
+        
+        return lines
+    
+    def generate_herb_recommendations(self, batch_weight: float):
+        """Generate herb and supplement recommendations based on situation"""
+        self.herb_recommendations = self.herb_lines(batch_weight)
+    
+    def format_recipe_card(self, mix: Union[Dict[str, float], Mix, MixAnalysis],
+                           card_date: Optional[date] = None,
+                           warnings: Optional[Sequence[Tuple[str, str]]] = None,
+                           suggestions: Optional[Sequence[str]] = None,
+                           herb_recommendations: Optional[Sequence[str]] = None) -> str:
+        """
+        Generate a printable recipe card, dated card_date (default today)
+        
+        Notes and herb lines default to the ones the calculator last
+        generated; pass them explicitly to leave the calculator untouched.
+        """
+        warnings = self.warnings if warnings is None else warnings
+        suggestions = self.suggestions if suggestions is None else suggestions
+        herb_recommendations = self.herb_recommendations if herb_recommendations is None else herb_recommendations
+        analysis = self.analyze(mix)
+        mix, nutrition, categories = analysis.mix, analysis.nutrition, analysis.categories
+        total_weight = analysis.total
         
         card = []
         card.append("═" * 70)
@@ -392,7 +1082,7 @@ class PigeonMixCalculator:
         card.append("")
         card.append(f"Situation: {self.profile['name']}")
         card.append(f"Total Batch Size: {total_weight:.0f}g")
-        card.append(f"Date: {datetime.now().strftime('%Y-%m-%d')}")
+        card.append(f"Date: {(card_date or datetime.now().date()).strftime('%Y-%m-%d')}")
         card.append("")
         
         card.append("INGREDIENTS:")
@@ -435,29 +1125,29 @@ class PigeonMixCalculator:
                 card.append(f"  • {line.strip()}")
         
         # Add herb recommendations
-        if self.herb_recommendations:
+        if herb_recommendations:
             card.append("")
             card.append("HERB & SUPPLEMENT RECOMMENDATIONS:")
             card.append("─" * 70)
-            for line in self.herb_recommendations:
+            for line in herb_recommendations:
                 if line:
                     card.append(f"  {line}")
                 else:
                     card.append("")
         
-        if self.warnings or self.suggestions:
+        if warnings or suggestions:
             card.append("")
             card.append("NOTES:")
             card.append("─" * 70)
             
-            for level, warning in self.warnings:
+            for level, warning in warnings:
                 prefix = "⚠ CRITICAL:" if level == "CRITICAL" else "⚡ Warning:"
                 card.append(f"  {prefix} {warning}")
             
-            if self.suggestions:
+            if suggestions:
                 card.append("")
                 card.append("  Suggestions for improvement:")
-                for suggestion in self.suggestions:
+                for suggestion in suggestions:
                     card.append(f"  • {suggestion}")
         
         card.append("")
@@ -470,23 +1160,410 @@ class PigeonMixCalculator:
         
         return "\n".join(card)
     
-    def calculate(self, target_weight: float = 1000) -> Tuple[Dict[str, float], str]:
+    def calculate(self, target_weight: float = 1000, engine: str = "sample", workers: int = 1,
+                  seed: Optional[int] = None, card_date: Optional[date] = None,
+                  deadline: Optional[float] = None, use_cache: bool = True) -> Tuple[Mix, str]:
         """
         Main calculation method
         
+        Identical inputs, seed and card_date give byte-identical results.
+        Reproducible runs (seeded, or a solver engine, without a deadline)
+        are stored in RESULT_CACHE, and in RESULT_STORE when one is open,
+        and repeat requests are served from them. The result's warnings,
+        suggestions and herb lines are kept on the calculator; use
+        compute() to share one calculator between threads.
+        
         Args:
             target_weight: Desired batch size in grams
+            engine: Optimization engine, one of ENGINES
+            workers: Worker processes for the 'sample' engine
+            seed: Seed for this run, overriding the calculator's seed
+            card_date: Date printed on the recipe card (default today)
+            deadline: Time budget in seconds for the optimizer
+            use_cache: Look up and store the result in RESULT_CACHE and
+                RESULT_STORE, and reuse 'lp' solutions from PROPORTION_CACHE
             
         Returns:
-            (mix_dict, recipe_card_string)
+            (Mix, recipe_card_string)
         """
-        mix = self.optimize_mix(target_weight)
-        self.check_warnings(mix)
-        self.generate_suggestions(mix)
-        self.generate_herb_recommendations(target_weight)
-        recipe_card = self.format_recipe_card(mix)
+        return self.restore_result(self.compute(target_weight, engine, workers, seed, card_date, deadline, use_cache))
+    
+    def compute(self, target_weight: float = 1000, engine: str = "sample", workers: int = 1,
+                seed: Optional[int] = None, card_date: Optional[date] = None,
+                deadline: Optional[float] = None, use_cache: bool = True,
+                stop: Optional[Event] = None) -> CalculationResult:
+        """
+        calculate() as a pure function of its arguments and the calculator's settings
+        
+        Nothing on the calculator is written, so one instance can serve any
+        number of threads at once. Arguments are as for calculate(); stop
+        is passed to optimize_mix, and a result it cut short is not cached.
+        """
+        card_date = card_date or datetime.now().date()
+        key = None
+        if use_cache and deadline is None:
+            key = self.cache_key(target_weight, engine, seed)
+        if key is not None:
+            cached = RESULT_CACHE.get(key)
+            if cached is not None:
+                return self.dated_result(cached, card_date)
+            stored = RESULT_STORE.get(key) if RESULT_STORE is not None else None
+            if stored is not None:
+                result = self.dated_result(CalculationResult(
+                    Mix(stored["mix"]), "",
+                    tuple(tuple(warning) for warning in stored["warnings"]),
+                    tuple(stored["suggestions"]), tuple(stored["herb_recommendations"])
+                ), card_date)
+                RESULT_CACHE.put(key, result)
+                return result
+        
+        notices = []
+        mix = Mix(self.optimize_mix(target_weight, engine, workers=workers, seed=seed, deadline=deadline,
+                                    use_cache=use_cache, stop=stop, notices=notices))
+        result = self.build_result(mix, target_weight, card_date, notices)
+        if key is not None and not (stop is not None and stop.is_set()):
+            RESULT_CACHE.put(key, result)
+            if RESULT_STORE is not None:
+                RESULT_STORE.put(key, {
+                    "mix": mix.to_dict(),
+                    "warnings": result.warnings,
+                    "suggestions": result.suggestions,
+                    "herb_recommendations": result.herb_recommendations
+                })
+        return result
+    
+    async def calculate_async(self, target_weight: float = 1000, engine: str = "sample", workers: int = 1,
+                              seed: Optional[int] = None, card_date: Optional[date] = None,
+                              deadline: Optional[float] = None, use_cache: bool = True,
+                              timeout: Optional[float] = None,
+                              executor: Optional["Executor"] = None) -> Tuple[Mix, str]:
+        """
+        calculate() for asyncio callers, run in an executor off the event loop
+        
+        Concurrent requests with the same cache_key() and card date are
+        coalesced into a single computation whose result every caller
+        receives, warnings, suggestions and herbs included. Cancelling a caller, or its timeout
+        expiring, stops that caller waiting; once no caller is left, the
+        search in the worker thread is stopped at its next deadline check
+        (process pool searches still run to completion) and nothing is
+        cached.
         
+        Args:
+            target_weight, engine, workers, seed, card_date, deadline,
+                use_cache: As for calculate()
+            timeout: Seconds to wait before raising asyncio.TimeoutError
+            executor: Thread pool to calculate in (default: the loop's)
+            
+        Returns:
+            (Mix, recipe_card_string)
+        """
+        card_date = card_date or datetime.now().date()
+        key = None
+        if use_cache and deadline is None:
+            key = self.cache_key(target_weight, engine, seed)
+        if key is not None:
+            key = (key, card_date)
+        
+        def compute(stop: Event) -> CalculationResult:
+            return self.compute(target_weight, engine, workers, seed, card_date, deadline, use_cache, stop)
+        
+        import asyncio
+        global INFLIGHT
+        if INFLIGHT is None:
+            from singleflight import SingleFlight
+            INFLIGHT = SingleFlight()
+        loop = asyncio.get_running_loop()
+        shared = INFLIGHT.run(key, lambda stop: loop.run_in_executor(executor, compute, stop))
+        return self.restore_result(await asyncio.wait_for(shared, timeout))
+    
+    def cache_key(self, target_weight: float, engine: str = "sample",
+                  seed: Optional[int] = None) -> Optional[Tuple]:
+        """
+        Canonical key of a calculate() request, or None if it is not reproducible
+        
+        Built from the normalized inventory (aliases merged), the warnings
+        about its names, the resolved profile, the target weight and the run
+        seed; unseeded sampling runs have no key. The card date is not part
+        of it: cached results get their recipe card redrawn for each date.
+        """
+        if engine == "sample":
+            seed = seed if seed is not None else self.seed
+            if seed is None:
+                return None
+        else:
+            seed = None
+        return (tuple(self.normalized_inventory().items()), tuple(self.name_warnings()), self.compiled_profile.key,
+                float(target_weight), engine, seed)
+    
+    def dated_result(self, result: CalculationResult, card_date: date) -> CalculationResult:
+        """A cached result with its recipe card drawn for card_date"""
+        recipe_card = self.format_recipe_card(result.mix, card_date, result.warnings, result.suggestions,
+                                              result.herb_recommendations)
+        return result._replace(recipe_card=recipe_card)
+    
+    def restore_result(self, cached: CalculationResult) -> Tuple[Mix, str]:
+        """Unpack a result, keeping its warnings, suggestions and herbs on the calculator"""
+        mix, recipe_card, warnings, suggestions, herbs = cached
+        self.warnings = list(warnings)
+        self.suggestions = list(suggestions)
+        self.herb_recommendations = list(herbs)
         return mix, recipe_card
+    
+    def report(self, mix: Union[Dict[str, float], Mix, MixAnalysis], target_weight: float = 1000,
+               card_date: Optional[date] = None) -> str:
+        """
+        Run the warnings, suggestions and herb recommendations for a mix and format its card
+        
+        All stages share one MixAnalysis, so nutrition and category ratios
+        are computed once.
+        """
+        return self.restore_result(self.build_result(mix, target_weight, card_date))[1]
+    
+    def build_result(self, mix: Union[Dict[str, float], Mix, MixAnalysis], target_weight: float = 1000,
+                     card_date: Optional[date] = None, notices: Sequence[Warning] = ()) -> CalculationResult:
+        """
+        report() without touching the calculator: the mix with its card, notes and herb lines
+        
+        notices are the solver warnings optimize_mix collected for the mix.
+        """
+        analysis = self.analyze(mix)
+        warnings = tuple(self.mix_warnings(analysis, notices))
+        suggestions = tuple(self.mix_suggestions(analysis))
+        herb_recommendations = tuple(self.herb_lines(target_weight))
+        recipe_card = self.format_recipe_card(analysis, card_date, warnings, suggestions, herb_recommendations)
+        return CalculationResult(analysis.mix, recipe_card, warnings, suggestions, herb_recommendations)
+
+
+def achievable_weight(caps: Sequence[float], target_weight: float,
+                      notices: Optional[List[Warning]] = None) -> float:
+    """Batch weight W = min(target_weight, ΣAᵢ) for the exact engines, with a notice when stock falls short"""
+    stock = sum(caps)
+    if stock < target_weight:
+        notify(notices, ShortStockWarning(
+            f"Only {stock:g}g in stock; the batch is {stock:g}g instead of {target_weight:g}g"))
+        return stock
+    return target_weight
+
+
+def notify(notices: Optional[List[Warning]], notice: Warning):
+    """Append a solver notice to notices, or warn it when no list is collecting them"""
+    if notices is None:
+        warn(notice, stacklevel=3)
+    else:
+        notices.append(notice)
+
+
+def scaled_solution(entry: Tuple[float, Dict[str, float]], caps: Dict[str, float],
+                    target_weight: float) -> Optional[Dict[str, float]]:
+    """
+    A cached (batch weight, mix) 'lp' solution scaled to target_weight, or None if it may not be optimal
+    
+    The solution for a batch B is reused for a batch W ≤ B when every
+    stocked ingredient has at least B grams and every scaled amount is
+    still MEANINGFUL_AMOUNT or more. No stock cap can then bind at either
+    size, so the model at W differs from the one at B only in its stricter
+    diversity threshold: every mix it allows was allowed at B and scored
+    no better there, and the scaled mix keeps the score it had.
+    """
+    batch_weight, mix = entry
+    if not 0 < target_weight <= batch_weight or min(caps.values()) < batch_weight:
+        return None
+    scale = target_weight / batch_weight
+    scaled = {name: amount * scale for name, amount in mix.items()}
+    if min(scaled.values()) < MEANINGFUL_AMOUNT:
+        return None
+    return scaled
+
+
+def open_result_store(path: Optional[str]) -> Optional["ResultStore"]:
+    """
+    Open (or with None, close) the persistent RESULT_STORE used by calculate()
+    
+    Results computed with a different CATALOG_VERSION are purged on open.
+    """
+    global RESULT_STORE
+    if RESULT_STORE is not None:
+        RESULT_STORE.close()
+    if path is None:
+        RESULT_STORE = None
+    else:
+        from result_store import ResultStore
+        RESULT_STORE = ResultStore(path, CATALOG_VERSION)
+    return RESULT_STORE
+
+
+def build_snapshot(path: str = SNAPSHOT_PATH):
+    """Compile the catalog from the Python source and write it as a snapshot"""
+    write_snapshot(path, compile_catalog(), SNAPSHOT_SOURCES)
+
+
+def calculate(request: CalculationRequest) -> CalculationResult:
+    """
+    Stateless calculation entry point
+    
+    Builds a throwaway calculator for the request, so there is no mutable
+    state shared between calls beyond the thread-safe caches; any number
+    of threads can call this at once.
+    """
+    calculator = PigeonMixCalculator(request.inventory, request.situation, seed=request.seed)
+    return calculator.compute(request.target_weight, request.engine, request.workers, request.seed,
+                              request.card_date, request.deadline, request.use_cache)
+
+
+def calculate_all_situations(inventory: Dict[str, float], target_weight: float = 1000,
+                             engine: str = "sample", seed: Optional[int] = None,
+                             refine: bool = True,
+                             card_date: Optional[date] = None) -> Dict[str, Tuple[Mix, str]]:
+    """
+    Run calculate for every situation in PROFILES on one inventory
+    
+    With the 'sample' engine, candidates are generated once and every batch
+    is scored against all profiles, sharing the nutrient matrix; only the
+    'lp' starting point, refinement and the recipe cards run per situation. Solver engines solve
+    each profile's model in turn. Each result equals calculate() for that
+    situation with the same seed.
+    
+    Returns:
+        Dict of situation: (Mix, recipe_card_string), in PROFILES order
+    """
+    calculators = {situation: PigeonMixCalculator(inventory, situation, seed=seed) for situation in PROFILES}
+    if engine != "sample":
+        return {situation: calculator.calculate(target_weight, engine, card_date=card_date)
+                for situation, calculator in calculators.items()}
+    
+    first = next(iter(calculators.values()))
+    available = first.get_available_ingredients()
+    mixes = dict.fromkeys(calculators, Mix({}))
+    if available:
+        search, groups = first.pool_ingredients(available)
+        candidates = first.iter_packed_candidates(search, target_weight, first.resolve_seed(seed))
+        ranked = select_top_for_situations(calculators, candidates, REFINE_TOP if refine else 1)
+        for situation, calculator in calculators.items():
+            starts = ranked[situation]
+            if refine:
+                starts = merge_ranked(starts, calculator.lp_starts(search, target_weight))
+            if not starts:
+                mix = calculator.fallback_mix(search, target_weight)
+            else:
+                mix = starts[0][1]
+                if refine:
+                    for _, mix in calculator.iter_refined_mixes(search, starts):
+                        pass
+            mixes[situation] = Mix(split_pooled_mix(mix, groups, available))
+    
+    return {situation: (mixes[situation], calculator.report(mixes[situation], target_weight, card_date))
+            for situation, calculator in calculators.items()}
+
+
+def select_top_for_situations(calculators: Dict[str, PigeonMixCalculator],
+                              candidates: Iterable[Tuple[int, Tuple[int, ...], array]],
+                              k: int = 1) -> Dict[str, List[Tuple[float, Dict[str, float]]]]:
+    """
+    Best k packed candidates for each calculator's profile from one pass
+    
+    Mix features (nutrition and category ratios, as NumPy arrays when it is
+    installed) are computed once per batch and scored against every profile.
+    Per profile, the result equals that calculator's select_top_packed.
+    """
+    heaps = {situation: [] for situation in calculators}
+    first = next(iter(calculators.values()))
+    candidates = iter(candidates)
+    while True:
+        batch = list(itertools.islice(candidates, BATCH_SIZE))
+        if not batch:
+            break
+        
+        packed = [(ids, amounts) for _, ids, amounts in batch]
+        if HAVE_NUMPY:
+            features = first.get_batch_scorer().packed_features(packed)
+            scores = {situation: calculator.get_batch_scorer().score(features).tolist()
+                      for situation, calculator in calculators.items()}
+        else:
+            features = [(CATALOG.nutrition(*mix), CATALOG.category_ratios(*mix), len(mix[0])) for mix in packed]
+            scores = {situation: [calculator.compiled_profile.score(*feature) for feature in features]
+                      for situation, calculator in calculators.items()}
+        
+        for situation, heap in heaps.items():
+            for score, (position, ids, amounts) in zip(scores[situation], batch):
+                keep_top(heap, (score, -position, (ids, amounts)), k)
+    
+    return {situation: [(score, CATALOG.unpack(*packed)) for score, _, packed in sorted_top(heap)]
+            for situation, heap in heaps.items()}
+
+
+def merge_ranked(ranked: List[Tuple[float, Dict[str, float]]], starts: List[Tuple[float, Dict[str, float]]],
+                 k: int = REFINE_TOP) -> List[Tuple[float, Dict[str, float]]]:
+    """Best k of sampled (score, mix) entries and extra starting points, best first; ties keep samples first"""
+    return sorted(ranked + starts, key=lambda entry: entry[0], reverse=True)[:k]
+
+
+def shared_catalog() -> "SharedCatalog":
+    """
+    CATALOG published in shared memory for worker processes
+    
+    Published on first use and reused by every later process pool; the
+    segment is removed when this process exits.
+    """
+    global SHARED_CATALOG
+    if SHARED_CATALOG is None or SHARED_CATALOG.catalog is not CATALOG:
+        if SHARED_CATALOG is not None:
+            SHARED_CATALOG.close()
+        else:
+            atexit.register(lambda: SHARED_CATALOG.close())
+        from shared_catalog import SharedCatalog
+        SHARED_CATALOG = SharedCatalog(CATALOG)
+    return SHARED_CATALOG
+
+
+def attach_catalog(handle: Optional["CatalogHandle"]):
+    """Process pool initializer: use the published catalog instead of this worker's own copy"""
+    global CATALOG
+    if handle is not None:
+        from shared_catalog import attach
+        CATALOG = attach(handle)
+        BATCH_SCORERS.clear()
+
+
+def search_pool(workers: int) -> "ProcessPoolExecutor":
+    """
+    Process pool for sharded searches, started on first use and reused
+    
+    Workers run shard_search.init_worker: they attach to the shared_catalog()
+    segment without importing this module, so none builds or loads a catalog
+    of its own. The pool is replaced when the worker count or the catalog
+    changes, and shut down when this process exits.
+    """
+    global SEARCH_POOL
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    
+    try:
+        initargs = (shared_catalog().handle, None, HAVE_NUMPY)
+    except OSError:
+        # No shared memory here; workers get a private copy of the catalog
+        initargs = (None, CATALOG, HAVE_NUMPY)
+    key = (workers,) + initargs
+    with SEARCH_POOL_LOCK:
+        if SEARCH_POOL is None or SEARCH_POOL[0] != key:
+            if SEARCH_POOL is not None:
+                SEARCH_POOL[1].shutdown(wait=False)
+            else:
+                atexit.register(shutdown_search_pool)
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(POOL_CONTEXT),
+                                       initializer=shard_search.init_worker, initargs=initargs)
+            SEARCH_POOL = (key, pool)
+        return SEARCH_POOL[1]
+
+
+def shutdown_search_pool(pool: Optional["ProcessPoolExecutor"] = None):
+    """Shut down the search_pool() (only if it is still `pool`, when given); the next search starts a new one"""
+    global SEARCH_POOL
+    with SEARCH_POOL_LOCK:
+        if SEARCH_POOL is None or (pool is not None and SEARCH_POOL[1] is not pool):
+            return
+        _, current = SEARCH_POOL
+        SEARCH_POOL = None
+    current.shutdown(wait=False)
 
 
 def main():
@@ -567,7 +1644,10 @@ def main():
     print("\nCalculating optimal mix...")
     print()
     
-    calculator = PigeonMixCalculator(inventory, situation)
+    # Opt-in, as for batch_cli: repeat seeded requests come from the store
+    open_result_store(os.environ.get("PIGEON_MIX_STORE"))
+    seed = os.environ.get("PIGEON_MIX_SEED")
+    calculator = PigeonMixCalculator(inventory, situation, seed=int(seed) if seed else None)
     mix, recipe_card = calculator.calculate(batch_size)
     
     # Display results
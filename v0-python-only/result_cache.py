@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+In-memory result cache for the Pigeon Mix Calculator
+A thread-safe LRU mapping from canonical calculation requests to finished
+results, with hit/miss/eviction counters.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, NamedTuple, Optional
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: int
+
+
+class ResultCache:
+    """Least-recently-used cache holding at most `maxsize` results"""
+
+    def __init__(self, maxsize: int = 256):
+        """
+        Args:
+            maxsize: Results to keep; 0 disables caching
+        """
+        if maxsize < 0:
+            raise ValueError("Cache size must be non-negative")
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, usable: Optional[Callable[[Any], bool]] = None) -> Optional[Any]:
+        """
+        Stored result for key, marked most recently used, or None
+
+        Args:
+            key: Canonical request
+            usable: Check the stored result must pass to be returned; one
+                that fails counts as a miss
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None or (usable is not None and not usable(value)):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        """Store a result, evicting the least recently used beyond maxsize"""
+        with self._lock:
+            if self.maxsize == 0:
+                return
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def resize(self, maxsize: int):
+        """Change the capacity, evicting the oldest results if it shrinks"""
+        if maxsize < 0:
+            raise ValueError("Cache size must be non-negative")
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+    def clear(self):
+        """Drop every result and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(self.hits, self.misses, self.evictions, len(self._entries), self.maxsize)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self):
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
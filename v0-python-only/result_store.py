@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Persistent result store for the Pigeon Mix Calculator
+Keeps finished calculations in an SQLite database (stdlib sqlite3) so CLI
+runs and worker processes can reuse each other's results. Every row records
+the catalog version it was computed with; rows from any other version are
+ignored and purged, so edits to the ingredients, profiles or weights
+invalidate old results automatically. The store keeps only the most
+recently written rows, up to a fixed bound.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Hashable, Optional
+
+# Bump when the stored value layout changes
+STORE_FORMAT = 2
+
+# Rows kept by default; older ones are evicted as new ones are written
+DEFAULT_MAX_ROWS = 10000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    catalog TEXT NOT NULL,
+    value TEXT NOT NULL
+)
+"""
+
+
+def catalog_version(*parts: Any) -> str:
+    """
+    Content hash of everything that decides a result
+
+    Args:
+        parts: JSON-serializable pieces, e.g. INGREDIENTS, PROFILES and
+            SCORE_WEIGHTS; tuples hash like lists
+    """
+    payload = json.dumps([STORE_FORMAT, parts], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultStore:
+    """
+    SQLite-backed mapping of canonical request keys to JSON results
+
+    Safe to share between threads and processes: each thread of each
+    process opens its own connection, the database runs in WAL mode and
+    writers wait up to `timeout` seconds for the lock. Every put() evicts
+    the rows written before the last `max_rows`.
+    """
+
+    def __init__(self, path: str, catalog: str, timeout: float = 30.0, max_rows: int = DEFAULT_MAX_ROWS):
+        """
+        Args:
+            path: Database file, created if missing
+            catalog: Current catalog_version(); rows of other versions are purged
+            timeout: Seconds to wait for a locked database
+            max_rows: Most rows kept; the least recently written go first
+        """
+        self.path = path
+        self.catalog = catalog
+        self.timeout = timeout
+        self.max_rows = max_rows
+        self._local = threading.local()
+        connection = self._connection()
+        connection.execute("DELETE FROM results WHERE catalog != ?", (catalog,))
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(SCHEMA)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    @staticmethod
+    def encode_key(key: Hashable) -> str:
+        return json.dumps(key, separators=(",", ":"))
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Stored value for key under the current catalog, or None"""
+        row = self._connection().execute(
+            "SELECT value FROM results WHERE key = ? AND catalog = ?",
+            (self.encode_key(key), self.catalog)
+        ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def put(self, key: Hashable, value: Any):
+        """Store a JSON-serializable value, replacing any older row for key"""
+        connection = self._connection()
+        cursor = connection.execute(
+            "INSERT OR REPLACE INTO results (key, catalog, value) VALUES (?, ?, ?)",
+            (self.encode_key(key), self.catalog, json.dumps(value))
+        )
+        # A new row gets the largest rowid, so at most max_rows rows are above lastrowid - max_rows
+        connection.execute("DELETE FROM results WHERE rowid <= ?", (cursor.lastrowid - self.max_rows,))
+
+    def __len__(self) -> int:
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM results WHERE catalog = ?", (self.catalog,)
+        ).fetchone()[0]
+
+    def close(self):
+        """Close this thread's connection"""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
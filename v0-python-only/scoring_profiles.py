@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Compiled scoring profiles for the Pigeon Mix Calculator
+Turns a PROFILES entry into an immutable object holding the score targets,
+their reciprocals and the component weights, so scoring does no dict
+lookups or midpoint arithmetic per mix. Compiled profiles are plain tuples:
+they can be shared by any number of calculators and pickled to workers.
+"""
+
+from typing import Dict, NamedTuple, Tuple
+
+MACROS = ("protein", "carbs", "fat")
+
+
+class CompiledProfile(NamedTuple):
+    """
+    Score targets of one situation profile
+
+    macros and categories hold (name, target, 1 / target, weight) rows; a
+    row scores max(0, 1 - |actual - target| / target) times its weight.
+    """
+    key: str
+    name: str
+    macros: Tuple[Tuple[str, float, float, float], ...]
+    fiber_limit: float
+    fiber_reciprocal: float
+    fiber_weight: float
+    categories: Tuple[Tuple[str, float, float, float], ...]
+    diversity_weight: float
+    diversity_count: int
+
+    def score(self, nutrition: Dict[str, float], categories: Dict[str, float], count: int) -> float:
+        """
+        Score from nutrient percentages, category percentages and ingredient count
+
+        Same value as the weighted sum in score_mix, up to float rounding.
+        """
+        total = 0.0
+        for nutrient, target, reciprocal, weight in self.macros:
+            total += weight * max(0.0, 1 - abs(nutrition[nutrient] - target) * reciprocal)
+
+        fiber = nutrition["fiber"]
+        if fiber < self.fiber_limit:
+            total += self.fiber_weight
+        else:
+            total += self.fiber_weight * max(0.0, 1 - (fiber - self.fiber_limit) * self.fiber_reciprocal)
+
+        for category, target, reciprocal, weight in self.categories:
+            total += weight * max(0.0, 1 - abs(categories.get(category, 0) - target) * reciprocal)
+
+        return total + self.diversity_weight * min(1.0, count / self.diversity_count)
+
+
+def compile_profile(key: str, profile: dict, weights: Dict[str, float], diversity_count: int,
+                    fiber_limit: float = 5) -> CompiledProfile:
+    """
+    Compile a PROFILES entry
+
+    Args:
+        key: Situation key, e.g. 'racing'
+        profile: The PROFILES entry
+        weights: Score component weights (SCORE_WEIGHTS)
+        diversity_count: Ingredients needed for the full diversity bonus
+        fiber_limit: Fiber percentage above which the fiber score drops
+    """
+    macros = []
+    for nutrient in MACROS:
+        target = sum(profile[nutrient]) / 2
+        macros.append((nutrient, target, 1 / target, weights[nutrient]))
+
+    ratios = profile["category_ratios"]
+    categories = []
+    for category, (low, high) in ratios.items():
+        target = (low + high) / 2
+        categories.append((category, target, 1 / target, weights["category"] / len(ratios)))
+
+    return CompiledProfile(
+        key=key,
+        name=profile["name"],
+        macros=tuple(macros),
+        fiber_limit=fiber_limit,
+        fiber_reciprocal=1 / fiber_limit,
+        fiber_weight=weights["fiber"],
+        categories=tuple(categories),
+        diversity_weight=weights["diversity"],
+        diversity_count=diversity_count
+    )
+
+
+def compile_profiles(profiles: Dict[str, dict], weights: Dict[str, float],
+                     diversity_count: int) -> Dict[str, CompiledProfile]:
+    """Compile every entry of PROFILES, keyed like PROFILES"""
+    return {key: compile_profile(key, profile, weights, diversity_count) for key, profile in profiles.items()}
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Sharded candidate search for the Pigeon Mix Calculator v2
+Candidate generation and top-k selection over catalog IDs and grams, plus
+the process pool worker that scores one combination-rank shard. Workers
+import only this module and the compiled catalog pieces it needs: they
+attach to the catalog published by shared_catalog instead of importing
+the calculator, so they never build or load their own ingredient catalog.
+"""
+
+from array import array
+import heapq
+import itertools
+import random
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from combination_ranks import iter_combination_ranks
+from compiled_catalog import CompiledCatalog, PackedMix
+from scoring_profiles import CompiledProfile
+
+# Shared memory and NumPy are imported by the workers that use them
+if TYPE_CHECKING:
+    from shared_catalog import CatalogHandle
+
+# Catalog of this worker process, set by init_worker
+CATALOG: Optional[CompiledCatalog] = None
+
+# Whether this worker scores with batch_scoring; the calculator's HAVE_NUMPY
+USE_NUMPY = False
+
+# Packed-mix scorers of this worker by profile key, built on first use
+SCORERS: Dict[str, Callable[[List[PackedMix]], List[float]]] = {}
+
+
+def combination_rng(seed: int, rank: int) -> random.Random:
+    """
+    Independent child stream for one ingredient combination of a run
+
+    String seeds are hashed with SHA-512, so streams for different ranks are
+    independent and identical in every process and worker.
+    """
+    return random.Random(f"{seed}/{rank}")
+
+
+def iter_stock_candidates(ingredient_ids: Sequence[int], stock: Sequence[float], target_weight: float,
+                          seed: int, variations: int, start: int = 0,
+                          stop: Optional[int] = None) -> Iterator[Tuple[int, Tuple[int, ...], array]]:
+    """
+    Yield (position, ids, amounts) for the combination ranks in [start, stop)
+
+    Args:
+        ingredient_ids: Catalog IDs of the stocked ingredients
+        stock: Grams available of each
+        target_weight: Batch weight in grams
+        seed: Run seed; each combination draws from combination_rng(seed, rank)
+        variations: Random ratio variations sampled per combination
+    """
+    sizes = range(min(3, len(stock)), min(8, len(stock)) + 1)
+
+    # Try different combinations
+    for rank, indices in iter_combination_ranks(len(stock), sizes, start, stop):
+        ids = tuple(ingredient_ids[i] for i in indices)
+        caps = [stock[i] for i in indices]
+        last = len(indices) - 1
+        rng = combination_rng(seed, rank)
+
+        # Generate several ratio variations for this combination
+        for variation in range(variations):
+            amounts = array("d")
+            remaining = target_weight
+
+            for i, cap in enumerate(caps):
+                if i == last:
+                    # Last ingredient gets remainder
+                    amount = min(remaining, cap)
+                else:
+                    # Random proportion
+                    max_amount = min(remaining * 0.7, cap)
+                    amount = rng.uniform(remaining * 0.05, max_amount)
+
+                amounts.append(amount)
+                remaining -= amount
+
+            # Normalize to target weight
+            actual_total = sum(amounts)
+            if actual_total > 0:
+                scale = min(target_weight / actual_total, 1.0)
+                amounts = array("d", [v * scale for v in amounts])
+
+                # Check if we have enough of each ingredient
+                if all(amount <= cap for amount, cap in zip(amounts, caps)):
+                    yield rank * variations + variation, ids, amounts
+
+
+def keep_top_packed(candidates: Iterable[Tuple[int, Tuple[int, ...], array]],
+                    score_packed: Callable[[List[PackedMix]], List[float]], k: int,
+                    batch_size: int) -> List[Tuple[float, int, PackedMix]]:
+    """
+    Best k of packed (position, ids, amounts) candidates, scored batch_size at a time
+
+    Returns:
+        [(score, position, (ids, amounts))] sorted best first; ties go to
+        the lowest position
+    """
+    heap = []
+    candidates = iter(candidates)
+    while True:
+        batch = list(itertools.islice(candidates, batch_size))
+        if not batch:
+            break
+        scores = score_packed([(ids, amounts) for _, ids, amounts in batch])
+        for score, (position, ids, amounts) in zip(scores, batch):
+            keep_top(heap, (score, -position, (ids, amounts)), k)
+
+    return [(score, -neg, packed) for score, neg, packed in sorted_top(heap)]
+
+
+def keep_top(heap: List[Tuple], entry: Tuple, k: int):
+    """Push a (score, -position, mix) entry onto a min-heap holding the best k"""
+    if len(heap) < k:
+        heapq.heappush(heap, entry)
+    elif entry[:2] > heap[0][:2]:
+        heapq.heapreplace(heap, entry)
+
+
+def sorted_top(heap: List[Tuple]) -> List[Tuple]:
+    """Entries of a keep_top heap, best first"""
+    return sorted(heap, key=lambda e: e[:2], reverse=True)
+
+
+def init_worker(handle: Optional["CatalogHandle"], catalog: Optional[CompiledCatalog], use_numpy: bool):
+    """
+    Process pool initializer: attach to the published catalog
+
+    Args:
+        handle: Published catalog segment, or None without shared memory
+        catalog: Pickled private copy, used only when handle is None
+        use_numpy: Score with batch_scoring
+    """
+    global CATALOG, USE_NUMPY
+    if handle is not None:
+        from shared_catalog import attach
+        catalog = attach(handle)
+    CATALOG = catalog
+    USE_NUMPY = use_numpy
+    SCORERS.clear()
+
+
+def packed_scorer(profile: CompiledProfile) -> Callable[[List[PackedMix]], List[float]]:
+    """Scorer of packed mixes against this worker's catalog, built once per profile"""
+    scorer = SCORERS.get(profile.key)
+    if scorer is None:
+        if USE_NUMPY:
+            from batch_scoring import BatchScorer
+            scorer = BatchScorer(CATALOG, profile).score_packed
+        else:
+            def scorer(mixes: List[PackedMix]) -> List[float]:
+                return [profile.score(CATALOG.nutrition(ids, amounts), CATALOG.category_ratios(ids, amounts), len(ids))
+                        for ids, amounts in mixes]
+        SCORERS[profile.key] = scorer
+    return scorer
+
+
+def search_shard(profile: CompiledProfile, ingredient_ids: Tuple[int, ...], stock: array, target_weight: float,
+                 seed: int, variations: int, start: int, stop: int, k: int,
+                 batch_size: int) -> List[Tuple[float, int, PackedMix]]:
+    """Score one combination-rank shard in a worker process and return its best k, packed"""
+    candidates = iter_stock_candidates(ingredient_ids, stock, target_weight, seed, variations, start, stop)
+    return keep_top_packed(candidates, packed_scorer(profile), k, batch_size)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Shared-memory compiled catalog for worker processes
+The publishing process copies a CompiledCatalog's nutrient block and
+category column into one multiprocessing.shared_memory segment, once.
+Worker processes attach to it by name and get a CompiledCatalog (and, from
+it, BatchScorer matrices) that read the segment in place instead of
+holding their own copy; tasks then only need ingredient IDs and amounts.
+"""
+
+from multiprocessing import shared_memory
+from typing import NamedTuple, Tuple
+
+from compiled_catalog import NUTRIENTS, CompiledCatalog
+
+DOUBLE = 8
+
+
+class CatalogHandle(NamedTuple):
+    """Everything a worker needs to attach: the segment name and the ingredient names"""
+    segment: str
+    names: Tuple[str, ...]
+
+
+class AttachedMemory(shared_memory.SharedMemory):
+    """A worker's mapping of the segment, kept until the catalog views on it are gone"""
+
+    def __del__(self):
+        try:
+            self.close()
+        except (BufferError, OSError):
+            # Catalog or scorer views still alive at interpreter shutdown
+            pass
+
+
+class SharedCatalog:
+    """A catalog published in shared memory; the owner closes it to free the segment"""
+
+    def __init__(self, catalog: CompiledCatalog):
+        self.catalog = catalog
+        nutrient_bytes = len(catalog.nutrients) * DOUBLE
+        self.memory = shared_memory.SharedMemory(create=True, size=max(1, nutrient_bytes + len(catalog.category)))
+        self.memory.buf[:nutrient_bytes] = memoryview(catalog.nutrients).cast("B")
+        self.memory.buf[nutrient_bytes:nutrient_bytes + len(catalog.category)] = memoryview(catalog.category).cast("B")
+        self.handle = CatalogHandle(self.memory.name, catalog.names)
+
+    def close(self):
+        """Release and remove the segment; catalogs already attached keep their mapping"""
+        self.memory.close()
+        self.memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach(handle: CatalogHandle) -> CompiledCatalog:
+    """
+    CompiledCatalog reading a published segment in place
+
+    The catalog keeps the segment mapped for as long as it lives; it is
+    meant to replace a worker's own catalog for the life of the process.
+    """
+    memory = AttachedMemory(name=handle.segment)
+    count = len(handle.names)
+    nutrient_bytes = len(NUTRIENTS) * count * DOUBLE
+    catalog = CompiledCatalog.from_buffers(
+        handle.names,
+        memory.buf[:nutrient_bytes].cast("d"),
+        memory.buf[nutrient_bytes:nutrient_bytes + count].cast("b"),
+    )
+    catalog.shared_memory = memory
+    return catalog
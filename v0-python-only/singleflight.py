@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Request coalescing for the Pigeon Mix Calculator's asyncio API
+Concurrent calls with the same key share one computation: the first caller
+starts it, later callers await the same task, and the key is released as
+soon as the task finishes. A caller that is cancelled or times out stops
+waiting; once every caller has, the computation's stop event is set so it
+can end early, and the key is released so new callers start afresh.
+"""
+
+import asyncio
+from threading import Event
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class Flight:
+    """One shared computation: its task, its stop event and how many callers await it"""
+
+    def __init__(self, task: asyncio.Future, stop: Event):
+        self.task = task
+        self.stop = stop
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Registry of in-flight computations by (event loop, key)"""
+
+    def __init__(self):
+        self._flights: Dict[Tuple[asyncio.AbstractEventLoop, Hashable], Flight] = {}
+
+    async def run(self, key: Optional[Hashable], start: Callable[[Event], Awaitable[Any]]) -> Any:
+        """
+        Result of start(stop), shared with every concurrent call under the same key
+
+        Args:
+            key: Identity of the request; None runs start() uncoalesced
+            start: Makes the coroutine or future that computes the result,
+                given a threading.Event that is set when nobody awaits it
+                any more
+        """
+        loop = asyncio.get_running_loop()
+        slot = None if key is None else (loop, key)
+        flight = None if slot is None else self._flights.get(slot)
+        if flight is None:
+            stop = Event()
+            flight = Flight(asyncio.ensure_future(start(stop), loop=loop), stop)
+            if slot is not None:
+                self._flights[slot] = flight
+            flight.task.add_done_callback(lambda done: self._release(slot, flight))
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                flight.stop.set()
+                self._forget(slot, flight)
+
+    def _forget(self, slot: Optional[Tuple[asyncio.AbstractEventLoop, Hashable]], flight: Flight):
+        if slot is not None and self._flights.get(slot) is flight:
+            del self._flights[slot]
+
+    def _release(self, slot: Optional[Tuple[asyncio.AbstractEventLoop, Hashable]], flight: Flight):
+        self._forget(slot, flight)
+        # Every waiter may have given up; retrieve the exception so it is not logged as lost
+        if not flight.task.cancelled():
+            flight.task.exception()
+
+    def __len__(self) -> int:
+        return len(self._flights)
@@ -0,0 +1,818 @@
+#!/usr/bin/env python3
+"""
+Test script for Pigeon Mix Calculator v2.0
+Checks the sampling engine and the calculator API
+"""
+
+import itertools
+import random
+import time
+from datetime import date
+
+from expanded_ingredients import INGREDIENTS
+from pigeon_mix_calculator_v2 import PigeonMixCalculator
+
+WELL_STOCKED = {
+    "wheat": 5000,
+    "corn_yellow": 4000,
+    "peas": 3000,
+    "lentils": 2000,
+    "safflower": 800,
+    "barley": 3000,
+    "millet": 500
+}
+
+
+def test_top_k_matches_full_list():
+    calculator = PigeonMixCalculator(WELL_STOCKED, "racing")
+    available = calculator.get_available_ingredients()
+
+    candidates = calculator.generate_mix_candidates(available, seed=5)
+    expected = sorted((calculator.score_mix(mix) for mix in candidates), reverse=True)[:3]
+
+    ranked = calculator.rank_mixes(1000, k=3, seed=5)
+    assert all(abs(score - best) < 1e-12 for (score, _), best in zip(ranked, expected))
+    assert calculator.optimize_mix(1000, seed=5, refine=False) == ranked[0][1]
+
+
+def test_candidates_are_streamed():
+    calculator = PigeonMixCalculator(WELL_STOCKED, "racing")
+    candidates = calculator.iter_mix_candidates(calculator.get_available_ingredients())
+
+    assert next(candidates) is not None
+    assert not isinstance(candidates, list)
+
+
+def test_rank_mixes_small_inventory():
+    calculator = PigeonMixCalculator({"wheat": 100, "peas": 50}, "maintenance")
+    ranked = calculator.rank_mixes(1000, k=25)
+
+    assert len(ranked) == 10
+    assert all(a[0] >= b[0] for a, b in zip(ranked, ranked[1:]))
+
+
+def test_batch_scores_match_score_mix():
+    calculator = PigeonMixCalculator(WELL_STOCKED, "molting")
+    mixes = calculator.generate_mix_candidates(calculator.get_available_ingredients())[:500]
+    mixes.append({})
+
+    for score, mix in zip(calculator.score_mixes(mixes), mixes):
+        assert abs(score - calculator.score_mix(mix)) < 1e-12
+
+
+def test_equivalent_ingredients_are_pooled():
+    inventory = {"wheat": 3000, "wheat_hard_red": 2000, "peas": 500, "peas_green": 800,
+                 "millet": 100, "millet_red": 60, "linseed": 100, "flaxseed": 50}
+    calculator = PigeonMixCalculator(inventory, "racing")
+    available = calculator.get_available_ingredients()
+    pooled, groups = calculator.pool_ingredients(available)
+
+    assert sorted(pooled) == ["linseed", "millet", "peas", "wheat"]
+    assert groups["millet"] == ["millet", "millet_red"]
+    assert pooled["wheat"]["available"] == 5000
+
+    mix = calculator.optimize_mix(1000, engine="milp")
+    assert sum(mix.values()) == 1000
+    assert all(amount == int(amount) and amount <= inventory[name] for name, amount in mix.items())
+
+
+def test_sharded_search_matches_serial():
+    calculator = PigeonMixCalculator(WELL_STOCKED, "winter")
+
+    serial = calculator.rank_mixes(1000, k=3, seed=42)
+    sharded = calculator.rank_mixes(1000, k=3, workers=2, seed=42)
+    assert serial == sharded
+
+    mix = calculator.optimize_mix(1000, workers=2, seed=42, refine=False)
+    assert mix == calculator.optimize_mix(1000, seed=42, refine=False) == serial[0][1]
+    assert calculator.optimize_mix(1000, workers=2, seed=42) == calculator.optimize_mix(1000, seed=42)
+
+
+def test_shared_catalog():
+    import pickle
+    import pigeon_mix_calculator_v2
+    import shard_search
+    from shared_catalog import SharedCatalog, attach
+
+    catalog = pigeon_mix_calculator_v2.CATALOG
+    mixes = [catalog.pack(mix) for mix in ({"wheat": 400, "peas": 300, "safflower": 300},
+                                           {"corn": 500, "millet": 250, "oats": 250})]
+    with SharedCatalog(catalog) as shared:
+        attached = attach(shared.handle)
+        assert attached.names == catalog.names and attached.columns == catalog.columns
+        assert list(attached.category) == list(catalog.category)
+        assert [attached.nutrition(*mix) for mix in mixes] == [catalog.nutrition(*mix) for mix in mixes]
+        # Copies made for pickling no longer depend on the segment
+        copy = pickle.loads(pickle.dumps(attached))
+    assert copy.columns == catalog.columns and copy.ids == catalog.ids
+
+    # Workers get IDs and grams, and return packed mixes
+    calculator = PigeonMixCalculator(WELL_STOCKED, "racing")
+    available = calculator.get_available_ingredients()
+    ids, stock = catalog.pack({name: data["available"] for name, data in available.items()})
+    shard_search.init_worker(None, catalog, pigeon_mix_calculator_v2.HAVE_NUMPY)
+    top = shard_search.search_shard(calculator.compiled_profile, ids, stock, 1000, 42,
+                                    pigeon_mix_calculator_v2.CANDIDATE_VARIATIONS, 0, 50, 2, 64)
+    serial = calculator.select_top_packed(calculator.iter_packed_candidates(available, 1000, 42, 0, 50), 2)
+    assert [(score, position, catalog.unpack(*packed)) for score, position, packed in top] == serial
+
+
+
+def test_search_workers_skip_catalog_build():
+    import os
+    import subprocess
+    import sys
+
+    # Spawned workers, so nothing is inherited: a search worker imports
+    # shard_search only, and stays smaller than a process that imports the
+    # calculator (and with it builds or loads a catalog)
+    script = """
+import importlib, multiprocessing, resource
+from concurrent.futures import ProcessPoolExecutor
+import pigeon_mix_calculator_v2 as v2
+v2.POOL_CONTEXT = "spawn"
+calculator = v2.PigeonMixCalculator({"wheat": 5000, "peas": 3000, "corn": 3000, "safflower": 2000}, "racing")
+calculator.optimize_mix(1000, workers=2, seed=42, refine=False)
+pool = v2.search_pool(2)
+assert pool is v2.search_pool(2)
+assert not pool.submit(eval, "'pigeon_mix_calculator_v2' in __import__('sys').modules").result()
+worker = pool.submit(resource.getrusage, resource.RUSAGE_SELF).result().ru_maxrss
+with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn"), initializer=importlib.import_module,
+                         initargs=("pigeon_mix_calculator_v2",)) as full:
+    full.submit(v2.PigeonMixCalculator({}, "racing").score_mixes, [{"wheat": 500, "peas": 500}]).result()
+    calculator_worker = full.submit(resource.getrusage, resource.RUSAGE_SELF).result().ru_maxrss
+print(worker, calculator_worker)
+"""
+    output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+    worker, calculator_worker = map(int, output.split())
+    assert worker < calculator_worker
+
+def test_combination_ranks():
+    from combination_ranks import iter_combination_ranks, unrank_combination
+
+    expected = [c for k in range(3, 8) for c in itertools.combinations(range(7), k)]
+    assert [combo for _, combo in iter_combination_ranks(7, range(3, 8))] == expected
+    assert [combo for _, combo in iter_combination_ranks(7, range(3, 8), 30, 77)] == expected[30:77]
+    assert tuple(unrank_combination(17, 7, 4)) == list(itertools.combinations(range(7), 4))[17]
+
+
+def test_seeded_runs_are_identical():
+    first = PigeonMixCalculator(WELL_STOCKED, "molting", seed=7)
+    second = PigeonMixCalculator(dict(WELL_STOCKED), "molting", seed=7)
+
+    random.seed(1)
+    first_result = first.calculate(1500, card_date=date(2026, 1, 1))
+    random.seed(2)
+    second_result = second.calculate(1500, card_date=date(2026, 1, 1))
+    assert first_result == second_result
+    assert first.calculate(1500, card_date=date(2026, 1, 1)) == first_result
+
+    # Refinement from the 'lp' start can settle on the same mix; the samples still differ
+    other = PigeonMixCalculator(WELL_STOCKED, "molting", seed=8).optimize_mix(1500, refine=False)
+    assert other != first.optimize_mix(1500, refine=False)
+
+
+def test_rng_parameter():
+    first = PigeonMixCalculator(WELL_STOCKED, "racing", rng=random.Random(3))
+    second = PigeonMixCalculator(WELL_STOCKED, "racing", rng=random.Random(3))
+
+    assert first.optimize_mix(1000) == second.optimize_mix(1000)
+    assert first.optimize_mix(1000) == second.optimize_mix(1000)
+
+
+def test_progressive_mixes_improve():
+    calculator = PigeonMixCalculator(WELL_STOCKED, "breeding", seed=11)
+    progress = list(calculator.iter_improving_mixes(1000))
+
+    scores = [score for score, _ in progress]
+    assert scores == sorted(set(scores))
+    assert progress[-1][1] == calculator.optimize_mix(1000)
+
+
+def test_deadline_returns_best_so_far():
+    inventory = {name: 400 for name in INGREDIENTS}
+    calculator = PigeonMixCalculator(inventory, "winter", seed=3)
+
+    start = time.monotonic()
+    mix = calculator.optimize_mix(5000, deadline=0.05)
+    assert time.monotonic() - start < 1
+    assert mix and all(amount <= 400 for amount in mix.values())
+
+
+def test_deadline_starts_from_lp():
+    # Early samples only combine the first catalog ingredients; the lp start covers the whole catalog
+    inventory = {name: (40, 300, 2000, 8000)[i % 4] for i, name in enumerate(INGREDIENTS)}
+    for situation in ["racing", "winter"]:
+        calculator = PigeonMixCalculator(inventory, situation, seed=1)
+        lp_score = calculator.score_mix(calculator.optimize_mix(1000, engine="lp"))
+        first_score, _ = next(calculator.iter_improving_mixes(1000))
+        assert first_score >= lp_score - 1e-9
+        assert calculator.score_mix(calculator.optimize_mix(1000, deadline=0.2)) >= lp_score - 1e-9
+
+
+def test_refinement_improves_sampled_mix():
+    inventory = {"wheat": 5000, "corn_yellow": 4000, "peas": 300, "lentils": 2000,
+                 "safflower": 80, "barley": 3000, "millet": 500, "hemp": 60}
+    for situation in ["maintenance", "racing", "breeding", "molting", "winter"]:
+        calculator = PigeonMixCalculator(inventory, situation, seed=4)
+        sampled = calculator.optimize_mix(1000, refine=False)
+        refined = calculator.optimize_mix(1000)
+
+        assert calculator.score_mix(refined) > calculator.score_mix(sampled)
+        assert sum(refined.values()) <= 1000 + 1e-6
+        assert all(amount <= inventory[name] for name, amount in refined.items())
+
+
+def test_neighbour_moves():
+    from mix_refinement import neighbour_mixes
+
+    mix = {"wheat": 30, "peas": 10}
+    caps = {"wheat": 100, "peas": 15, "millet": 50}
+    moves = list(neighbour_mixes(mix, caps, 20))
+
+    assert {"wheat": 10, "peas": 30} not in moves
+    assert {"wheat": 10, "peas": 10, "millet": 20} in moves
+    assert {"wheat": 40} in moves
+    assert {"wheat": 30, "millet": 10} in moves
+    assert all(abs(sum(move.values()) - 40) < 1e-9 for move in moves)
+
+
+def test_compiled_profiles():
+    import pickle
+    from pigeon_mix_calculator_v2 import COMPILED_PROFILES, PROFILES
+
+    mix = {"wheat": 300, "peas": 200, "corn_yellow": 200, "safflower": 50}
+    for situation, profile in PROFILES.items():
+        calculator = PigeonMixCalculator(WELL_STOCKED, situation)
+        compiled = calculator.compiled_profile
+        assert compiled is COMPILED_PROFILES[situation]
+        assert compiled is PigeonMixCalculator({}, situation).compiled_profile
+        assert pickle.loads(pickle.dumps(compiled)) == compiled
+
+        nutrition = calculator.calculate_nutrition(mix)
+        categories = calculator.calculate_category_ratios(mix)
+        expected = 0.05 * min(1.0, len(mix) / 5)
+        expected += 0.10 * (1.0 if nutrition["fiber"] < 5 else max(0, 1 - (nutrition["fiber"] - 5) / 5))
+        for nutrient, weight in (("protein", 0.30), ("carbs", 0.25), ("fat", 0.15)):
+            target = sum(profile[nutrient]) / 2
+            expected += weight * max(0, 1 - abs(nutrition[nutrient] - target) / target)
+        for cat, (low, high) in profile["category_ratios"].items():
+            target = (low + high) / 2
+            expected += 0.15 / 3 * max(0, 1 - abs(categories[cat] - target) / target)
+        assert abs(calculator.score_mix(mix) - expected) < 1e-12
+
+
+def test_all_situations_match_calculate():
+    from pigeon_mix_calculator_v2 import PROFILES, calculate_all_situations
+
+    card_date = date(2026, 3, 1)
+    results = calculate_all_situations(WELL_STOCKED, 1200, seed=9, card_date=card_date)
+    assert list(results) == list(PROFILES)
+    for situation, result in results.items():
+        calculator = PigeonMixCalculator(WELL_STOCKED, situation, seed=9)
+        assert result == calculator.calculate(1200, card_date=card_date)
+
+
+def test_result_cache():
+    from pigeon_mix_calculator_v2 import RESULT_CACHE
+
+    RESULT_CACHE.clear()
+    card_date = date(2026, 3, 1)
+    first = PigeonMixCalculator({"Corn": 1500, "corn_yellow": 2500, "Wheat": 3000, "peas": 2000,
+                                 "safflower": 500}, "racing", seed=2)
+    result = first.calculate(1000, card_date=card_date)
+    assert RESULT_CACHE.stats()[:3] == (0, 1, 0)
+
+    aliases = PigeonMixCalculator({"wheat": 3000, "peas": 2000, "corn_yellow": 4000,
+                                   "safflower_seed": 500}, "Racing", seed=2)
+    warnings = first.warnings
+    assert aliases.calculate(1000, card_date=card_date) == result
+    assert aliases.warnings == warnings
+    assert RESULT_CACHE.stats()[:3] == (1, 1, 0)
+
+    try:
+        result[0]["wheat"] = -1
+    except TypeError:
+        pass
+    else:
+        assert False, "cached mixes should be immutable"
+
+    PigeonMixCalculator(WELL_STOCKED).calculate(1000)
+    assert len(RESULT_CACHE) == 1
+
+    RESULT_CACHE.resize(1)
+    first.calculate(1000, engine="lp", card_date=card_date)
+    assert RESULT_CACHE.stats() == (1, 2, 1, 1, 1)
+
+    RESULT_CACHE.resize(256)
+    RESULT_CACHE.clear()
+
+    # Unknown situations resolve to the maintenance profile and share its results
+    maintenance = PigeonMixCalculator(WELL_STOCKED, "maintenance", seed=2).calculate(1000, card_date=card_date)
+    assert PigeonMixCalculator(WELL_STOCKED, "Resting", seed=2).calculate(1000, card_date=card_date) == maintenance
+    assert len(RESULT_CACHE) == 1
+    RESULT_CACHE.clear()
+    assert PigeonMixCalculator(WELL_STOCKED, "Resting", seed=2).calculate(1000, card_date=card_date) == maintenance
+    RESULT_CACHE.clear()
+
+
+def calculate_in_store(path, seed):
+    import pigeon_mix_calculator_v2
+
+    pigeon_mix_calculator_v2.open_result_store(path)
+    return PigeonMixCalculator(WELL_STOCKED, "breeding", seed=seed).calculate(1000, card_date=date(2026, 3, 1))
+
+
+def test_result_store():
+    import os
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor
+    import pigeon_mix_calculator_v2
+    from pigeon_mix_calculator_v2 import RESULT_CACHE, open_result_store
+    from result_store import ResultStore
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "results.sqlite3")
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            results = list(pool.map(calculate_in_store, [path] * 2, [1, 2]))
+
+        store = open_result_store(path)
+        assert len(store) == 2
+        RESULT_CACHE.clear()
+        calculator = PigeonMixCalculator(WELL_STOCKED, "breeding", seed=2)
+        assert calculator.calculate(1000, card_date=date(2026, 3, 1)) == results[1]
+        assert RESULT_CACHE.stats()[:2] == (0, 1)
+        assert all(isinstance(warning, tuple) for warning in calculator.warnings)
+
+        # The card date is not part of the key; the card is redrawn for it
+        RESULT_CACHE.clear()
+        mix, recipe_card = calculator.calculate(1000, card_date=date(2026, 4, 1))
+        assert mix == results[1][0] and "Date: 2026-04-01" in recipe_card
+        assert recipe_card == results[1][1].replace("2026-03-01", "2026-04-01")
+        assert len(store) == 2
+
+        bounded = ResultStore(os.path.join(directory, "bounded.sqlite3"), "catalog", max_rows=3)
+        for i in range(5):
+            bounded.put(["key", i], i)
+        bounded.put(["key", 2], "rewritten")
+        assert len(bounded) == 3
+        assert [bounded.get(["key", i]) for i in range(5)] == [None, None, "rewritten", 3, 4]
+        bounded.put(["key", 5], 5)
+        assert [bounded.get(["key", i]) for i in range(6)] == [None, None, "rewritten", None, 4, 5]
+        bounded.close()
+
+        stale = ResultStore(path, "another catalog")
+        assert len(stale) == 0
+        stale.close()
+        assert len(open_result_store(path)) == 0
+
+        open_result_store(None)
+        assert pigeon_mix_calculator_v2.RESULT_STORE is None
+        RESULT_CACHE.clear()
+
+
+def test_lp_solutions_rescaled():
+    from pigeon_mix_calculator_v2 import MEANINGFUL_AMOUNT, PROPORTION_CACHE
+
+    PROPORTION_CACHE.clear()
+    inventory = {name: 6000 for name in ("wheat", "corn_yellow", "peas", "lentils", "safflower", "barley",
+                                         "millet", "oats", "sunflower", "hemp")}
+    calculator = PigeonMixCalculator(inventory, "racing")
+    large = calculator.optimize_mix(4000, engine="lp")
+    assert calculator.optimize_mix(4000, engine="lp") == large
+    assert PROPORTION_CACHE.stats()[:2] == (1, 1)
+
+    # Every cap holds the whole 4 kg batch, so the 1 kg optimum is the same mix scaled
+    small = calculator.optimize_mix(1000, engine="lp")
+    assert PROPORTION_CACHE.stats()[:2] == (2, 1)
+    assert small == {name: amount / 4 for name, amount in large.items()}
+    assert min(small.values()) >= MEANINGFUL_AMOUNT
+    fresh = calculator.optimize_mix(1000, engine="lp", use_cache=False)
+    assert abs(calculator.score_mix(small) - calculator.score_mix(fresh)) < 1e-9
+
+    # Larger batches, and batches too small for every amount to stay meaningful, are solved afresh
+    assert calculator.optimize_mix(5000, engine="lp") == calculator.optimize_mix(5000, engine="lp", use_cache=False)
+    assert PROPORTION_CACHE.stats()[:2] == (2, 2)
+    calculator.optimize_mix(40, engine="lp")
+    assert PROPORTION_CACHE.stats()[:2] == (2, 3)
+
+    # A cap below the solved batch may bind, so nothing is reused
+    PROPORTION_CACHE.clear()
+    capped = PigeonMixCalculator({**inventory, "safflower": 1200}, "racing")
+    capped.optimize_mix(4000, engine="lp")
+    assert capped.optimize_mix(1000, engine="lp") == capped.optimize_mix(1000, engine="lp", use_cache=False)
+    assert PROPORTION_CACHE.stats().hits == 0
+
+    # Sampling is not cached here; RESULT_CACHE holds its repeat requests
+    PigeonMixCalculator(inventory, "racing", seed=6).optimize_mix(1000)
+    assert PROPORTION_CACHE.stats().hits == 0 and len(PROPORTION_CACHE) == 1
+    PROPORTION_CACHE.clear()
+
+
+def test_cached_sampling_matches_cold_run():
+    from pigeon_mix_calculator_v2 import PROPORTION_CACHE, RESULT_CACHE
+
+    # Stock for 25 kg, so the 1 kg run could fit every cap
+    inventory = {"wheat": 20000, "corn_yellow": 20000, "peas": 20000, "lentils": 20000,
+                 "safflower": 8000, "barley": 20000}
+    PROPORTION_CACHE.clear()
+    RESULT_CACHE.clear()
+    cold = PigeonMixCalculator(inventory, "racing", seed=1).calculate(25000, card_date=date(2026, 5, 1))
+    PROPORTION_CACHE.clear()
+    RESULT_CACHE.clear()
+    PigeonMixCalculator(inventory, "racing", seed=1).calculate(1000, card_date=date(2026, 5, 1))
+    warm = PigeonMixCalculator(inventory, "racing", seed=1).calculate(25000, card_date=date(2026, 5, 1))
+    assert warm == cold
+    PROPORTION_CACHE.clear()
+    RESULT_CACHE.clear()
+
+
+def test_compiled_catalog():
+    from pigeon_mix_calculator_v2 import CATALOG
+
+    calculator = PigeonMixCalculator(WELL_STOCKED, "breeding")
+    mix = {"peas": 250.5, "wheat": 400, "safflower": 80, "millet": 120}
+    ids, amounts = CATALOG.pack(mix)
+    assert CATALOG.unpack(ids, amounts) == mix
+    assert [CATALOG.names[i] for i in ids] == list(mix)
+    assert CATALOG.nutrition(ids, amounts) == calculator.calculate_nutrition(mix)
+    assert CATALOG.category_ratios(ids, amounts) == calculator.calculate_category_ratios(mix)
+
+    available = calculator.get_available_ingredients()
+    packed = list(itertools.islice(calculator.iter_packed_candidates(available, seed=1), 50))
+    mixes = [mix for _, mix in itertools.islice(calculator.iter_ranked_candidates(available, seed=1), 50)]
+    assert [CATALOG.unpack(ids, amounts) for _, ids, amounts in packed] == mixes
+    scores = calculator.score_packed([(ids, amounts) for _, ids, amounts in packed])
+    assert all(abs(a - b) < 1e-12 for a, b in zip(scores, calculator.score_mixes(mixes)))
+
+
+def test_mix_analysis():
+    from mix_types import Mix
+
+    calculator = PigeonMixCalculator(WELL_STOCKED, "winter")
+    mix = Mix({"wheat": 400, "corn_yellow": 300, "peas": 150, "hemp": 50, "oats": 100})
+    assert mix == dict(mix) and mix.total == 1000
+    try:
+        mix.total = 5
+    except AttributeError:
+        pass
+    else:
+        assert False, "Mix should be immutable"
+
+    analysis = calculator.analyze(mix)
+    assert calculator.analyze(analysis) is analysis
+    assert dict(analysis.nutrition) == calculator.calculate_nutrition(mix)
+    assert dict(analysis.categories) == calculator.calculate_category_ratios(mix)
+    assert analysis.score == calculator.score_mix(mix)
+    assert analysis.nutrition is analysis.nutrition
+
+    calls = []
+    nutrition = analysis.catalog.nutrition
+    analysis.catalog.nutrition = lambda *args: calls.append(args) or nutrition(*args)
+    try:
+        card = calculator.report(dict(mix), 1000, date(2026, 3, 1))
+    finally:
+        del analysis.catalog.nutrition
+    assert len(calls) == 1
+    assert card == calculator.format_recipe_card(mix, date(2026, 3, 1))
+
+
+def test_alias_resolver():
+    from pigeon_mix_calculator_v2 import NAME_RESOLVER
+
+    calculator = PigeonMixCalculator({})
+    assert calculator.normalize_ingredient_name("Yellow Corn") == "corn_yellow"
+    assert calculator.normalize_ingredient_name("pea") == "peas"
+    assert calculator.normalize_ingredient_name("peas-field") == "peas_field"
+    assert calculator.normalize_ingredient_name("yellow peas") == "peas_yellow"
+    assert calculator.normalize_ingredient_name("hemp seeds") == "hemp"
+    assert calculator.normalize_ingredient_name("sunflowerseed") == "sunflower"
+    assert calculator.normalize_ingredient_name("unobtainium") == "unobtainium"
+    assert all(calculator.normalize_ingredient_name(key) == key for key in INGREDIENTS)
+    # Partial matches below MIN_CONFIDENCE are only suggestions, whatever the method
+    for name in ["peanut", "peanuts", "canary seed", "bird seed", "seed", "red", "white", "green"]:
+        assert calculator.normalize_ingredient_name(name) == name.replace(" ", "_")
+    assert NAME_RESOLVER.match("peanut") == ("peas", "substring", 0.5)
+    assert NAME_RESOLVER.match("red") == ("rice_red", "tokens", 0.5)
+
+    match = NAME_RESOLVER.match("rapeseed")
+    assert match.key == "rapeseed" and match.method == "exact"
+    assert NAME_RESOLVER.match("thistle").method == "alias"
+    ranked = NAME_RESOLVER.ranked("red")
+    assert ranked == NAME_RESOLVER.ranked("red") and len(ranked) == 5
+    assert [m.confidence for m in ranked] == sorted((m.confidence for m in ranked), reverse=True)
+    hits = NAME_RESOLVER.match.cache_info().hits
+    calculator.normalize_ingredient_name("Yellow Corn")
+    assert NAME_RESOLVER.match.cache_info().hits == hits + 1
+
+
+def test_typo_matching():
+    from ingredient_names import AliasResolver, edit_distance
+
+    assert edit_distance("kitten", "sitting") == 3
+    assert edit_distance("lentls", "lentils") == 1
+    assert edit_distance("flax", "falx") == 1
+    assert edit_distance("kitten", "sitting", limit=1) == 2
+
+    calculator = PigeonMixCalculator({"saflower": 500, "lentls": 2000, "sunflwer": 300, "wheat": 4000,
+                                      "wht": 100, "qwertyuiop": 100, "hemp seeds": 200})
+    assert calculator.normalized_inventory() == {
+        "wheat": 4000, "lentils": 2000, "safflower": 500, "sunflower": 300, "hemp": 200,
+    }
+    warnings = [text for _, text in calculator.name_warnings()]
+    assert warnings == [
+        "'saflower' read as safflower (89% match)",
+        "'lentls' read as lentils (86% match)",
+        "'sunflwer' read as sunflower (89% match)",
+        "Unknown ingredient 'wht' ignored - did you mean wheat? (60% match)",
+        "Unknown ingredient 'qwertyuiop' ignored",
+    ]
+    # Exact, alias and whole-token matches are certain and not reported
+    assert PigeonMixCalculator({"Yellow Corn": 100, "hemp seeds": 100, "peas": 100}).name_warnings() == []
+    calculator.check_warnings({"wheat": 600, "lentils": 400})
+    assert [text for _, text in calculator.warnings[-len(warnings):]] == warnings
+
+    # The trigram index keeps lookups cheap as the catalog grows
+    rng = random.Random(0)
+    keys = list(INGREDIENTS) + [f"{rng.choice(list(INGREDIENTS))}_lot{i}" for i in range(3000)]
+    resolver = AliasResolver(keys, {})
+    assert resolver.resolve("buckweat") == "buckwheat"
+    assert resolver.resolve("corn_yelow") == "corn_yellow"
+
+
+def test_catalog_snapshot():
+    import os
+    import shutil
+    import tempfile
+    import pigeon_mix_calculator_v2
+    from catalog_snapshot import PREFIX, load_snapshot, write_snapshot
+
+    compiled = pigeon_mix_calculator_v2.compile_catalog()
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "expanded_ingredients.py")
+        shutil.copy(pigeon_mix_calculator_v2.SNAPSHOT_SOURCES[0], source)
+        path = os.path.join(directory, "catalog.snapshot")
+        write_snapshot(path, compiled, [source])
+
+        loaded = load_snapshot(path, [source])
+        assert loaded["INGREDIENTS"] == INGREDIENTS
+        assert loaded["CATALOG_VERSION"] == pigeon_mix_calculator_v2.CATALOG_VERSION
+        assert loaded["CATALOG"].columns == pigeon_mix_calculator_v2.CATALOG.columns
+        assert loaded["COMPILED_PROFILES"] == pigeon_mix_calculator_v2.COMPILED_PROFILES
+        assert loaded["NAME_RESOLVER"].resolve("saflower") == "safflower"
+
+        # A corrupted body fails its digest and is never unpickled
+        with open(path, "rb") as handle:
+            data = handle.read()
+        body = PREFIX.size + PREFIX.unpack_from(data)[1]
+        rng = random.Random(0)
+        for _ in range(40):
+            corrupt = bytearray(data)
+            for position in rng.sample(range(body, len(data)), 3):
+                corrupt[position] ^= 0xFF
+            with open(path, "wb") as handle:
+                handle.write(corrupt)
+            assert load_snapshot(path, [source]) is None
+        with open(path, "wb") as handle:
+            handle.write(data)
+        assert load_snapshot(path, [source]) is not None
+
+        # Any edit to a source makes the snapshot stale
+        with open(source, "a") as handle:
+            handle.write("\n")
+        assert load_snapshot(path, [source]) is None
+        assert load_snapshot(os.path.join(directory, "missing.snapshot"), [source]) is None
+        with open(path, "wb") as handle:
+            handle.write(b"not a snapshot")
+        assert load_snapshot(path, [source]) is None
+
+
+def test_herbs_load_lazily():
+    import subprocess
+    import sys
+    import pigeon_mix_calculator_v2
+
+    probe = (
+        "import sys, pigeon_mix_calculator_v2 as m; "
+        "m.PigeonMixCalculator({'wheat': 5000, 'peas': 2000}).optimize_mix(1000, seed=0); "
+        "print('herbs_supplements' in sys.modules)"
+    )
+    output = subprocess.run([sys.executable, "-c", probe], check=True, capture_output=True, text=True).stdout
+    assert output.strip() == "False"
+
+    herbs, recommendations = pigeon_mix_calculator_v2.herb_data()
+    assert pigeon_mix_calculator_v2.HERBS_SUPPLEMENTS is herbs
+    assert pigeon_mix_calculator_v2.HERB_RECOMMENDATIONS is recommendations
+    calculator = PigeonMixCalculator(WELL_STOCKED, "racing")
+    calculator.generate_herb_recommendations(1000)
+    assert calculator.herb_recommendations[0] == "Recommended herbs/supplements for Racing/Performance:"
+
+
+def test_batch_jsonl():
+    import io
+    import json
+    import batch_cli
+    from batch_cli import run_batch
+
+    requests = [
+        {"id": "loft-1", "inventory": WELL_STOCKED, "situation": "racing", "seed": 3},
+        {"inventory": {"wheat": 5000, "peas": 2000}, "target_weight": 500, "engine": "lp"},
+        {"inventory": {"wheat": 5000}, "situation": "flying"},
+        {"inventory": {"wheat": 5000, "lentils": 2000, "safflower": 400}, "seed": 1},
+    ]
+    text = "\n".join(json.dumps(request) for request in requests) + "\n\nnot json\n"
+
+    outputs = []
+    for workers in (1, 2):
+        output = io.StringIO()
+        assert run_batch(io.StringIO(text), output, workers) == 2
+        outputs.append(output.getvalue())
+    assert outputs[0] == outputs[1]
+
+    results = [json.loads(line) for line in outputs[0].splitlines()]
+    assert [result["line"] for result in results] == [1, 2, 3, 4, 6]
+    assert results[0]["id"] == "loft-1" and results[0]["situation"] == "racing"
+    assert "Unknown situation" in results[2]["error"] and "Invalid JSON" in results[4]["error"]
+
+    mix, _ = PigeonMixCalculator(WELL_STOCKED, "racing", seed=3).calculate(1000)
+    assert results[0]["mix"] == mix
+    assert abs(results[1]["total"] - 500) < 1e-6 and results[1]["engine"] == "lp"
+
+    # Unexpected calculator errors become error records too
+    calculate = batch_cli.pigeon_mix_calculator_v2.calculate
+
+    def broken(request):
+        raise RuntimeError("solver crashed")
+
+    batch_cli.pigeon_mix_calculator_v2.calculate = broken
+    try:
+        failed, line = batch_cli.process_line(7, json.dumps({"id": "x", "inventory": {"wheat": 1000}}))
+    finally:
+        batch_cli.pigeon_mix_calculator_v2.calculate = calculate
+    assert failed and json.loads(line) == {"line": 7, "id": "x", "error": "RuntimeError: solver crashed"}
+
+
+def test_batch_rejects_non_finite():
+    import json
+    from batch_cli import MAX_TARGET_WEIGHT, dump, process_line
+
+    lines = [
+        '{"inventory": {"wheat": 5000}, "target_weight": NaN}',
+        '{"inventory": {"wheat": 5000}, "target_weight": Infinity}',
+        '{"inventory": {"wheat": 5000}, "target_weight": 1e300}',
+        '{"inventory": {"wheat": 5000}, "target_weight": %d}' % (MAX_TARGET_WEIGHT + 1),
+        '{"inventory": {"wheat": 5000}, "target_weight": %d}' % 10 ** 400,
+        '{"inventory": {"wheat": NaN, "peas": 2000}}',
+        '{"inventory": {"wheat": -Infinity, "peas": 2000}}',
+        '{"inventory": {"wheat": 5000}, "id": NaN}',
+    ]
+    for number, text in enumerate(lines, 1):
+        failed, line = process_line(number, text)
+        result = json.loads(line)
+        assert failed and set(result) == {"line", "error"} and result["line"] == number, line
+
+    failed, line = process_line(1, '{"inventory": {"wheat": 5000, "peas": 2000}, "target_weight": 500.5}')
+    assert not failed and abs(json.loads(line)["total"] - 500.5) < 1e-6
+
+    # Nothing non-standard is ever written, even from a broken result
+    failed, line = dump({"line": 3, "id": "x", "score": float("nan")})
+    assert failed and json.loads(line) == {"line": 3, "id": "x", "error": "Result has a non-finite number"}
+
+
+def test_daemon_round_trip():
+    import os
+    import stat
+    import subprocess
+    import sys
+    import tempfile
+    from mix_daemon import Client, ping
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "daemon.sock")
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mix_daemon.py")
+        daemon = subprocess.Popen([sys.executable, script, "--socket", path, "serve"], stderr=subprocess.DEVNULL)
+        try:
+            deadline = time.monotonic() + 60
+            while not ping(path):
+                assert daemon.poll() is None and time.monotonic() < deadline, "daemon did not start"
+                time.sleep(0.05)
+            assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+            request = {"inventory": {"wheat": 5000, "peas": 2000, "corn": 3000}, "seed": 2}
+            with Client(path) as client:
+                first = client.send(request)
+                client.socket.sendall(b"\xff\xfe\n")
+                assert b'"error"' in client.reader.readline()
+                assert client.send(request) == first
+                assert "error" in client.send({"inventory": {"wheat": 1}, "situation": "flying"})
+                assert client.send({"command": "stats"})["result_cache"]["hits"] >= 1
+            mix, _ = PigeonMixCalculator(request["inventory"], seed=2).calculate(1000)
+            assert first["mix"] == mix
+        finally:
+            daemon.terminate()
+            daemon.wait(timeout=30)
+        assert not os.path.exists(path)
+
+
+def test_calculate_async():
+    import asyncio
+    import threading
+    import pigeon_mix_calculator_v2
+
+    calls = []
+    release = threading.Event()
+    optimize_mix = PigeonMixCalculator.optimize_mix
+
+    def slow_optimize_mix(self, *args, **kwargs):
+        calls.append(args)
+        release.wait(10)
+        return optimize_mix(self, *args, **kwargs)
+
+    async def scenario():
+        calculators = [PigeonMixCalculator(WELL_STOCKED, "molting", seed=11) for _ in range(3)]
+        tasks = [asyncio.ensure_future(calculator.calculate_async(1000, card_date=date(2026, 3, 1)))
+                 for calculator in calculators]
+        await asyncio.sleep(0.05)
+        assert len(pigeon_mix_calculator_v2.INFLIGHT) == 1
+        tasks[0].cancel()
+        try:
+            await calculators[0].calculate_async(1000, card_date=date(2026, 3, 1), timeout=0.05)
+        except asyncio.TimeoutError:
+            pass
+        else:
+            assert False, "Expected a timeout"
+        release.set()
+        results = await asyncio.gather(*tasks[1:])
+        assert tasks[0].cancelled()
+        return calculators, results
+
+    PigeonMixCalculator.optimize_mix = slow_optimize_mix
+    try:
+        calculators, results = asyncio.run(scenario())
+    finally:
+        PigeonMixCalculator.optimize_mix = optimize_mix
+    assert len(calls) == 1 and len(pigeon_mix_calculator_v2.INFLIGHT) == 0
+    assert results[0] == results[1]
+    expected = PigeonMixCalculator(WELL_STOCKED, "molting", seed=11).calculate(1000, card_date=date(2026, 3, 1))
+    assert results[0] == expected
+    assert calculators[2].warnings == calculators[1].warnings and calculators[2].suggestions
+
+
+def test_calculate_async_timeout_stops_search():
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+    import pigeon_mix_calculator_v2
+
+    # Sampling the whole catalog takes minutes
+    calculator = PigeonMixCalculator({name: 2000 for name in INGREDIENTS}, "racing", seed=4)
+
+    async def scenario():
+        try:
+            await calculator.calculate_async(1000, card_date=date(2026, 3, 1), timeout=0.2, executor=executor)
+        except asyncio.TimeoutError:
+            pass
+        else:
+            assert False, "Expected a timeout"
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        asyncio.run(scenario())
+        started = time.monotonic()
+        executor.submit(lambda: None).result()
+        assert time.monotonic() - started < 5
+    assert len(pigeon_mix_calculator_v2.INFLIGHT) == 0
+    # The cut-short result was not cached
+    key = calculator.cache_key(1000)
+    assert pigeon_mix_calculator_v2.RESULT_CACHE.get(key) is None
+
+
+def test_stateless_calculate():
+    from concurrent.futures import ThreadPoolExecutor
+    import pigeon_mix_calculator_v2
+    from mix_types import CalculationRequest, CalculationResult
+
+    request = CalculationRequest(WELL_STOCKED, "breeding", 1500, seed=5, card_date=date(2026, 4, 2),
+                                 use_cache=False)
+    expected = pigeon_mix_calculator_v2.calculate(request)
+    assert isinstance(expected, CalculationResult) and expected.warnings is not None
+
+    shared = PigeonMixCalculator(WELL_STOCKED, "breeding", seed=5)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        computed = list(pool.map(lambda _: shared.compute(1500, card_date=date(2026, 4, 2), use_cache=False),
+                                 range(16)))
+        requested = list(pool.map(pigeon_mix_calculator_v2.calculate, [request] * 16))
+    assert all(result == expected for result in computed + requested)
+    # compute() leaves the shared calculator untouched
+    assert shared.warnings == [] and shared.suggestions == [] and shared.herb_recommendations == []
+
+    mix, recipe_card = shared.calculate(1500, card_date=date(2026, 4, 2), use_cache=False)
+    assert (mix, recipe_card) == expected[:2]
+    assert tuple(shared.warnings) == expected.warnings
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"  ✓ {name}")
+    print("All calculator v2 tests passed!")
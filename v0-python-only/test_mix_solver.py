@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Test script for the exact mix solvers
+Checks the solver engines against the sampling engine
+"""
+
+import warnings
+
+import pigeon_mix_calculator_v2
+from expanded_ingredients import INGREDIENTS
+from mix_solver import ShortStockWarning, SolverLimitWarning
+from pigeon_mix_calculator_v2 import MEANINGFUL_AMOUNT, PigeonMixCalculator
+
+WELL_STOCKED = {
+    "wheat": 5000,
+    "corn_yellow": 4000,
+    "peas": 3000,
+    "lentils": 2000,
+    "safflower": 800,
+    "barley": 3000,
+    "millet": 500
+}
+
+
+def test_lp_beats_sampling():
+    for situation in ["maintenance", "racing", "breeding", "molting", "winter"]:
+        calculator = PigeonMixCalculator(WELL_STOCKED, situation)
+        lp_mix = calculator.optimize_mix(1000, engine="lp")
+        sampled = calculator.optimize_mix(1000)
+
+        assert abs(sum(lp_mix.values()) - 1000) < 1e-6
+        assert calculator.score_mix(lp_mix) >= calculator.score_mix(sampled) - 1e-9
+
+
+def test_lp_earns_diversity():
+    # Two ingredients already make the best nutrition; the bonus needs five
+    inventory = {name: 3000 for name in list(INGREDIENTS)[:16]}
+    calculator = PigeonMixCalculator(inventory, "racing", seed=0)
+    lp_mix = calculator.optimize_mix(1000, engine="lp")
+    score = calculator.score_mix(lp_mix)
+
+    assert sum(1 for amount in lp_mix.values() if amount >= MEANINGFUL_AMOUNT) >= 5
+    assert not any("diversity" in message for _, message in calculator.mix_warnings(lp_mix))
+    assert score > calculator.score_mix({"wheat": 700, "oat_groats": 300}) + 0.02
+    # Best under score_mix among mixes with no ingredient below MEANINGFUL_AMOUNT
+    meaningful = [sampled for sampled, mix in calculator.rank_mixes(1000, k=50)
+                  if min(mix.values()) >= MEANINGFUL_AMOUNT]
+    assert meaningful and score >= max(meaningful) - 1e-9
+
+
+def test_lp_respects_stock():
+    inventory = {"wheat": 200, "peas": 150, "safflower": 40, "barley": 5000}
+    calculator = PigeonMixCalculator(inventory, "racing")
+    mix = calculator.optimize_mix(1000, engine="lp")
+
+    assert abs(sum(mix.values()) - 1000) < 1e-6
+    for name, amount in mix.items():
+        assert amount <= inventory[name] + 1e-6
+
+
+def test_lp_short_stock():
+    calculator = PigeonMixCalculator({"wheat": 300, "peas": 100}, "maintenance")
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        mix = calculator.optimize_mix(1000, engine="lp", use_cache=False)
+
+    assert abs(mix["wheat"] - 300) < 1e-6
+    assert abs(mix["peas"] - 100) < 1e-6
+    assert [warning.category for warning in caught] == [ShortStockWarning]
+
+
+def test_lp_node_limit_warns():
+    calculator = PigeonMixCalculator(WELL_STOCKED, "racing")
+    limit = pigeon_mix_calculator_v2.LP_NODE_LIMIT
+    pigeon_mix_calculator_v2.LP_NODE_LIMIT = 1
+    try:
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            mix = calculator.optimize_mix(1000, engine="lp", use_cache=False)
+    finally:
+        pigeon_mix_calculator_v2.LP_NODE_LIMIT = limit
+
+    assert [warning.category for warning in caught] == [SolverLimitWarning]
+    assert abs(sum(mix.values()) - 1000) < 1e-6
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", SolverLimitWarning)
+        calculator.optimize_mix(1000, engine="lp", use_cache=False)
+
+
+def test_milp_whole_grams():
+    calculator = PigeonMixCalculator(WELL_STOCKED, "breeding")
+    mix = calculator.optimize_mix(1000, engine="milp")
+    lp_mix = calculator.optimize_mix(1000, engine="lp")
+
+    assert sum(mix.values()) == 1000
+    assert all(amount == int(amount) for amount in mix.values())
+    assert all(amount <= WELL_STOCKED[name] for name, amount in mix.items())
+    assert sum(1 for amount in mix.values() if amount >= MEANINGFUL_AMOUNT) >= 5
+    # Whole grams can only lose against the continuous optimum, and only by rounding
+    assert calculator.score_mix(lp_mix) - 1e-3 <= calculator.score_mix(mix) <= calculator.score_mix(lp_mix) + 1e-9
+
+
+def test_milp_truncates_stock():
+    calculator = PigeonMixCalculator({"wheat": 300.7, "peas": 100.2}, "maintenance")
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        mix = calculator.optimize_mix(1000, engine="milp")
+
+    assert mix == {"wheat": 300.0, "peas": 100.0}
+    assert [warning.category for warning in caught] == [ShortStockWarning]
+    assert "400g instead of 1000g" in str(caught[0].message)
+
+
+def test_milp_large_inventory():
+    inventory = {name: 400 for name in INGREDIENTS}
+    calculator = PigeonMixCalculator(inventory, "winter")
+    mix = calculator.optimize_mix(5000, engine="milp")
+
+    assert sum(mix.values()) == 5000
+    assert calculator.score_mix(mix) > 0.99
+
+
+def test_milp_large_inventory_racing():
+    # Uneven stock across the whole catalog; racing needs far more nodes than winter
+    inventory = {name: (40, 300, 2000, 8000)[i % 4] for i, name in enumerate(INGREDIENTS)}
+    calculator = PigeonMixCalculator(inventory, "racing")
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", SolverLimitWarning)
+        mix = calculator.optimize_mix(1000, engine="milp")
+
+    assert sum(mix.values()) == 1000
+    assert all(amount == int(amount) and amount <= inventory[name] for name, amount in mix.items())
+    assert calculator.score_mix(mix) >= calculator.score_mix(calculator.optimize_mix(1000, engine="lp")) - 1e-3
+
+
+def test_milp_node_limit_warns():
+    calculator = PigeonMixCalculator(WELL_STOCKED, "racing")
+    limit = pigeon_mix_calculator_v2.MILP_NODE_LIMIT
+    pigeon_mix_calculator_v2.MILP_NODE_LIMIT = 1
+    try:
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            mix = calculator.optimize_mix(1000, engine="milp")
+    finally:
+        pigeon_mix_calculator_v2.MILP_NODE_LIMIT = limit
+
+    assert [warning.category for warning in caught] == [SolverLimitWarning]
+    assert sum(mix.values()) == 1000
+
+
+def test_solver_notices_reach_the_result():
+    import json
+    from batch_cli import process_line
+
+    short = ("WARNING", "Only 400g in stock; the batch is 400g instead of 1000g")
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        for engine in ("lp", "milp"):
+            calculator = PigeonMixCalculator({"wheat": 300, "peas": 100}, "maintenance")
+            _, recipe_card = calculator.calculate(1000, engine=engine, use_cache=False)
+            assert short in calculator.warnings
+            assert f"Warning: {short[1]}" in recipe_card
+
+        failed, line = process_line(1, json.dumps({"inventory": {"wheat": 300, "peas": 100}, "engine": "milp"}))
+        assert not failed and list(short) in json.loads(line)["warnings"]
+
+        limit = pigeon_mix_calculator_v2.MILP_NODE_LIMIT
+        pigeon_mix_calculator_v2.MILP_NODE_LIMIT = 1
+        try:
+            calculator = PigeonMixCalculator(WELL_STOCKED, "racing")
+            calculator.calculate(1000, engine="milp", use_cache=False)
+        finally:
+            pigeon_mix_calculator_v2.MILP_NODE_LIMIT = limit
+        assert any(text.startswith("MILP search stopped after") for _, text in calculator.warnings)
+
+
+def test_milp_rejects_fractional_target():
+    calculator = PigeonMixCalculator(WELL_STOCKED, "racing")
+    try:
+        calculator.optimize_mix(999.5, engine="milp")
+    except ValueError:
+        return
+    assert False, "fractional target weight should be rejected"
+
+
+def test_milp_progressive_ends_at_optimum():
+    calculator = PigeonMixCalculator(WELL_STOCKED, "racing")
+    progress = list(calculator.iter_improving_mixes(1000, engine="milp"))
+
+    scores = [score for score, _ in progress]
+    assert scores == sorted(set(scores))
+    assert progress[-1][1] == calculator.optimize_mix(1000, engine="milp")
+    assert calculator.optimize_mix(1000, engine="milp", deadline=0) == progress[0][1]
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"  ✓ {name}")
+    print("All solver tests passed!")